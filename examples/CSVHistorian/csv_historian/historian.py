@@ -22,9 +22,9 @@
 # ===----------------------------------------------------------------------===
 # }}}
 
-import csv
 import logging
 import os
+import re
 import sys
 
 from volttron.platform.agent import utils
@@ -35,6 +35,19 @@ utils.setup_logging()
 _log = logging.getLogger(__name__)
 __version__ = '1.0.1'
 
+_CSV_HEADER = b"timestamp,source,topic,value\r\n"
+_NEEDS_QUOTING = re.compile(r'[,"\r\n]')
+
+
+def _csv_field(value):
+    """Format a single value the way csv.writer's default dialect would."""
+    if value is None:
+        return ''
+    value = str(value)
+    if _NEEDS_QUOTING.search(value):
+        return '"' + value.replace('"', '""') + '"'
+    return value
+
 
 def historian(config_path, **kwargs):
     """
@@ -62,8 +75,8 @@ class CSVHistorian(BaseHistorian):
 
     def __init__(self, output_path="", **kwargs):
         self.output_path = output_path
-        self.csv_dict = None
         self.csv_file = None
+        self._buf = bytearray()
         self.default_dir = "./data"
         super(CSVHistorian, self).__init__(**kwargs)
 
@@ -71,18 +84,28 @@ class CSVHistorian(BaseHistorian):
         return __version__
 
     def publish_to_historian(self, to_publish_list):
+        # BaseHistorian calls this from its processing loop (a thread, or a
+        # greenlet with process_loop_in_greenlet), never from the pubsub
+        # callbacks that capture records.
+        buf = self._buf
         for record in to_publish_list:
-            row = dict()
-            row["timestamp"] = record["timestamp"]
-
-            row["source"] = record["source"]
-            row["topic"] = record["topic"]
-            row["value"] = record["value"]
-
-            self.csv_dict.writerow(row)
+            buf += "{},{},{},{}\r\n".format(_csv_field(record["timestamp"]),
+                                              _csv_field(record["source"]),
+                                              _csv_field(record["topic"]),
+                                              _csv_field(record["value"])).encode("utf-8")
+        # Write the whole batch in one call before acknowledging it, so no
+        # record is reported as handled while it only exists in memory.
+        self._flush_buffer()
 
         self.report_all_handled()
-        self.csv_file.flush()
+
+    def _flush_buffer(self):
+        if self._buf:
+            # A buffered writer writes all of the data or raises, unlike a
+            # raw FileIO write, which may write only part of it.
+            self.csv_file.write(self._buf)
+            self.csv_file.flush()
+            self._buf.clear()
 
     def historian_setup(self):
         # if the current file doesn't exist, or the path provided doesn't include a directory, use the default dir
@@ -92,12 +115,19 @@ class CSVHistorian(BaseHistorian):
                 os.mkdir(self.default_dir)
             self.output_path = os.path.join(self.default_dir, self.output_path)
 
-        self.csv_file = open(self.output_path, "w")
-
-
-        self.csv_dict = csv.DictWriter(self.csv_file, fieldnames=["timestamp", "source", "topic", "value"])
-        self.csv_dict.writeheader()
-        self.csv_file.flush()
+        # Each batch is assembled in self._buf and flushed to the file
+        # before it is reported as handled.
+        self.csv_file = open(self.output_path, "wb")
+        self._buf.clear()
+        self._buf += _CSV_HEADER
+
+    def historian_teardown(self):
+        if self.csv_file is None:
+            return
+        self._flush_buffer()
+        os.fsync(self.csv_file.fileno())
+        self.csv_file.close()
+        self.csv_file = None
 
 
 def main(argv=sys.argv):
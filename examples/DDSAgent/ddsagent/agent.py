@@ -55,6 +55,19 @@ class DDSAgent(Agent):
             self.writer[typename] = connector.getOutput(publisher_name)
             self.reader[typename] = connector.getInput(subscriber_name)
 
+        # The demo square only ever visits one position per second of the
+        # minute, so compute the circular path once up front.
+        center = 100
+        radius = 50
+        self._positions = [(center + int(radius * cos(pi * second / 15.0)),
+                            center + int(radius * sin(pi * second / 15.0)))
+                           for second in range(60)]
+        # Fields of the demo square that never change. They are written to
+        # the instance once and only x/y are updated on each tick.
+        self._sample = {"shapesize": 30,
+                        "color": "BLUE"}
+        self._square_initialized = False
+
     @Core.schedule(periodic(1))
     def publish_demo(self):
         """
@@ -63,18 +76,16 @@ class DDSAgent(Agent):
         program and subscribing to *square*.
         """
 
-        sample = {"shapesize": 30,
-                  "color": "BLUE"}
-
-        center = 100
-        radius = 50
-        now = datetime.datetime.now()
-        radians = pi * float(now.second) / 15.0
-
-        sample['x'] = center + int(radius * cos(radians))
-        sample['y'] = center + int(radius * sin(radians))
+        writer = self.writer['square']
+        instance = writer.instance
+        if not self._square_initialized:
+            instance.setDictionary(self._sample)
+            self._square_initialized = True
 
-        self.write_to_dds('square', sample)
+        x, y = self._positions[datetime.datetime.now().second]
+        instance.setNumber('x', x)
+        instance.setNumber('y', y)
+        writer.write()
 
     @RPC.export
     def read_from_dds(self, typename):
@@ -101,23 +112,19 @@ class DDSAgent(Agent):
         reader = self.reader[typename]
         reader.read()
 
-        # For this example we'll return all samples we can see
-        samples = []
+        # For this example we'll return all samples we can see.
+        # Struct fields can be retrieved as a dict or accessed
+        # individually. A dictionary will be easier in most cases.
+        is_valid = reader.infos.isValid
+        samples = reader.samples
+        get_dictionary = samples.getDictionary
 
         # Find out how many samples we have so
         # they can be explicitly indexed
-        n_samples = reader.samples.getLength()
+        n_samples = samples.getLength()
 
         # Indexes start at one. Yuck.
-        for i in range(1, n_samples + 1):
-            if reader.infos.isValid(i):
-                # Struct fields can be retrieved as a dict
-                # or accessed individually. A dictionary
-                # will be easier in most cases.
-                d = reader.samples.getDictionary(i)
-                samples.append(d)
-
-        return samples
+        return [get_dictionary(i) for i in range(1, n_samples + 1) if is_valid(i)]
 
     @RPC.export
     def write_to_dds(self, typename, sample):
@@ -139,6 +146,10 @@ class DDSAgent(Agent):
         writer.instance.setDictionary(sample)
         writer.write()
 
+        if typename == 'square':
+            # The constant demo fields may have been overwritten.
+            self._square_initialized = False
+
 
 def main():
     utils.vip_main(DDSAgent)
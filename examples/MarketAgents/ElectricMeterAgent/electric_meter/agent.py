@@ -66,10 +66,12 @@ class SampleElectricMeterAgent(MarketAgent):
     def __init__(self, market_name, **kwargs):
         super(SampleElectricMeterAgent, self).__init__(**kwargs)
         self.market_name = market_name
+        # The curve never changes, so build it once and offer the same one each time.
+        self.supply_curve = self.create_supply_curve()
         self.join_market(self.market_name, SELLER, None, self.offer_callback, None, self.price_callback, self.error_callback)
 
     def offer_callback(self, timestamp, market_name, buyer_seller):
-        self.make_offer(market_name, buyer_seller, self.create_supply_curve())
+        self.make_offer(market_name, buyer_seller, self.supply_curve)
 
     def create_supply_curve(self):
         supply_curve = PolyLine()
@@ -82,10 +84,10 @@ class SampleElectricMeterAgent(MarketAgent):
         return supply_curve
 
     def price_callback(self, timestamp, market_name, buyer_seller, price, quantity):
-        _log.debug("Report cleared price for Market: {} {}, Message: {}".format(market_name, buyer_seller, price, quantity))
+        _log.debug("Report cleared price for Market: %s %s, Price: %s Quantity: %s", market_name, buyer_seller, price, quantity)
 
     def error_callback(self, timestamp, market_name, buyer_seller, error_code, error_message, aux):
-        _log.debug("Report error for Market: {} {}, Code: {}, Message: {}".format(market_name, buyer_seller, error_code, error_message))
+        _log.debug("Report error for Market: %s %s, Code: %s, Message: %s", market_name, buyer_seller, error_code, error_message)
 
 def main():
     """Main method called to start the agent."""
@@ -71,29 +71,31 @@ class MeterAgent(MarketAgent):
         self.infinity=1000000
         self.num=0
         self.want_reservation = True
+        self.supply_curve = None
+        self.supply_curve_price = None
         self.join_market(self.market_name, SELLER, self.reservation_callback, self.offer_callback, None, self.price_callback, self.error_callback)
 
     def offer_callback(self, timestamp, market_name, buyer_seller):
         if self.has_reservation:
             curve = self.create_supply_curve()
-            _log.debug("Offer for Market: {} {}, Curve: {}".format(market_name, buyer_seller, curve))
+            _log.debug("Offer for Market: %s %s, Curve: %s", market_name, buyer_seller, curve)
             self.make_offer(market_name, buyer_seller, curve)
         else:
-            _log.debug("No offer for Market: {} {}".format(market_name, buyer_seller))
+            _log.debug("No offer for Market: %s %s", market_name, buyer_seller)
 
 
 
     def reservation_callback(self, timestamp, market_name, buyer_seller):
-        if (self.num % 2) == 0:
-            self.want_reservation = True
-        else:
-            self.want_reservation = False
-        _log.debug("Reservation for Market: {} {}, Wants reservation: {} Number: {}".format(market_name, buyer_seller, self.want_reservation, self.num))
-        self.num = (self.num + 1) % 256 # We don't want this number to get very large.
+        self.want_reservation = (self.num & 1) == 0
+        _log.debug("Reservation for Market: %s %s, Wants reservation: %s Number: %s", market_name, buyer_seller, self.want_reservation, self.num)
+        self.num = (self.num + 1) & 0xFF # We don't want this number to get very large.
         return self.want_reservation
 
 
     def create_supply_curve(self):
+        # Only rebuild the curve when the price has changed since the last offer.
+        if self.supply_curve is not None and self.supply_curve_price == self.price:
+            return self.supply_curve
         supply_curve = PolyLine()
         price = self.price
         quantity = self.infinity
@@ -101,13 +103,15 @@ class MeterAgent(MarketAgent):
         price = self.price
         quantity = 0
         supply_curve.add(Point(price=price, quantity=quantity))
+        self.supply_curve = supply_curve
+        self.supply_curve_price = self.price
         return supply_curve
 
     def price_callback(self, timestamp, market_name, buyer_seller, price, quantity):
-        _log.debug("Report the new cleared price for Market: {} {}, Message: {}".format(market_name, buyer_seller, price, quantity))
+        _log.debug("Report the new cleared price for Market: %s %s, Price: %s Quantity: %s", market_name, buyer_seller, price, quantity)
 
     def error_callback(self, timestamp, market_name, buyer_seller, error_code, error_message, aux):
-        _log.debug("Report error for Market: {} {}, Code: {}, Message: {}".format(market_name, buyer_seller, error_code, error_message))
+        _log.debug("Report error for Market: %s %s, Code: %s, Message: %s", market_name, buyer_seller, error_code, error_message)
 
 def main():
     """Main method called to start the agent."""
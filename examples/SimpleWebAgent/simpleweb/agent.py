@@ -45,7 +45,7 @@ __version__ = '0.1'
 # debug through pycharm, but still have the reference correct when we deploy
 # through the normal VOLTTRON control mechanisms.
 MY_PATH = os.path.dirname(__file__)
-WEBROOT = os.path.join(MY_PATH, "webroot")
+WEBROOT = os.path.abspath(os.path.join(MY_PATH, "webroot"))
 
 
 class SimpleWebAgent(Agent):
@@ -59,6 +59,11 @@ class SimpleWebAgent(Agent):
     def __init__(self, config_path, **kwargs):
         super(SimpleWebAgent, self).__init__(enable_web=True,
                                              **kwargs)
+        # The responses are constant so build them once.  Bodies stay as str
+        # because endpoint results are relayed to the platform web service
+        # over RPC, which cannot serialize bytes.
+        self._text_response = ("200 OK", "This is some text", [("Content-Type", "text/html")])
+        self._rpc_response = jsonrpc.json_result("id", "A large number of responses go here")
 
     @Core.receiver("onstart")
     def starting(self, sender, **kwargs):
@@ -80,7 +85,7 @@ class SimpleWebAgent(Agent):
         #
         # Note: filename is required as we don't currently autoredirect to
         # any default pages.
-        self.vip.web.register_path("/simpleweb", os.path.join(WEBROOT))
+        self.vip.web.register_path("/simpleweb", WEBROOT)
 
         # Note the following two examples show the way to call either a jsonrpc
         # (default) endpoint and one that returns a different content-type.
@@ -99,7 +104,7 @@ class SimpleWebAgent(Agent):
         """
         # Response Type 200 OK is normal operation
         # 404 is not found
-        return "200 OK", "This is some text", [("Content-Type", "text/html")]
+        return self._text_response
 
     def rpcendpoint(self, env, data):
         """
@@ -108,7 +113,7 @@ class SimpleWebAgent(Agent):
         """
         # Note we aren't using a valid json request to get the following output
         # id will need to be grabbed from data etc
-        return jsonrpc.json_result("id", "A large number of responses go here")
+        return self._rpc_response
 
 
 def main():
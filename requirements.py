@@ -81,6 +81,7 @@ extras_require = {'crate': ['crate==0.27.1'],
                               'pytest==7.1.2',
                               'pytest-timeout==2.1.0',
                               'pytest-rerunfailures==10.2',
+                              'pytest-xdist==2.5.0',
                               'websocket-client==1.2.2',
                               'deepdiff==5.8.1',
                               'docker==5.0.3',
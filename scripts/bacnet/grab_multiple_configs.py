@@ -26,19 +26,10 @@ import argparse
 import csv
 from os.path import dirname, join
 import os
-import errno
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 
 
-def makedirs(path):
-    try:
-        os.makedirs(path)
-    except OSError as exc:
-        if exc.errno == errno.EEXIST and os.path.isdir(path):
-            pass
-        else:
-            raise
-
 arg_parser = argparse.ArgumentParser()
 arg_parser.add_argument("csv_file", type=argparse.FileType('r'),
                         help="Input CSV file")
@@ -48,6 +39,10 @@ arg_parser.add_argument("--proxy-id", help="Use this VIP identity for the BACnet
 arg_parser.add_argument("--out-directory",
                         help="Output directory.", default=".")
 arg_parser.add_argument("--ini", help="BACPypes.ini config file to use")
+arg_parser.add_argument("--jobs", type=int, default=1,
+                        help="Number of devices to scan concurrently. Scans that do not use a proxy each "
+                             "bind the BACnet port from the ini file, so only raise this together "
+                             "with --use-proxy.")
 
 args = arg_parser.parse_args()
 
@@ -58,14 +53,21 @@ program_path = join(dirname(__file__), program_name)
 devices_dir = join(args.out_directory, "devices")
 registers_dir = join(args.out_directory, "registry_configs")
 
-makedirs(devices_dir)
-makedirs(registers_dir)
+os.makedirs(devices_dir, exist_ok=True)
+os.makedirs(registers_dir, exist_ok=True)
+
+reader = csv.reader(args.csv_file)
+header = next(reader, [])
+address_index = header.index("address")
+device_id_index = header.index("device_id")
+# Skip blank or short rows, which DictReader used to drop silently.
+min_length = max(address_index, device_id_index) + 1
+device_list = [row for row in reader if len(row) >= min_length]
 
-device_list = csv.DictReader(args.csv_file)
 
-for device in device_list:
-    address = device["address"]
-    device_id = device["device_id"]
+def scan(device):
+    address = device[address_index]
+    device_id = device[device_id_index]
 
     prog_args = ["python3", program_path]
     prog_args.append(device_id)
@@ -85,3 +87,8 @@ for device in device_list:
     print("executing command:", " ".join(prog_args))
 
     subprocess.call(prog_args)
+
+
+if device_list:
+    with ThreadPoolExecutor(max_workers=max(1, min(args.jobs, len(device_list)))) as executor:
+        list(executor.map(scan, device_list))
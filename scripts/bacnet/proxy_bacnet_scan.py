@@ -23,9 +23,10 @@
 # }}}
 
 import argparse
-import csv
 import logging
-from pprint import pprint
+import os
+import sys
+import time
 
 import gevent
 from volttron.platform.keystore import KeyStore
@@ -40,14 +41,40 @@ from volttron.platform.vip.agent import errors
 utils.setup_logging()
 _log = logging.getLogger(__name__)
 
+CSV_FIELD_NAMES = ["address",
+                   "device_id",
+                   "max_apdu_length",
+                   "segmentation_supported",
+                   "vendor_id"]
+CSV_HEADER = ",".join(CSV_FIELD_NAMES) + "\r\n"
+CSV_ROW = "{address},{device_id},{max_apdu_length},{segmentation_supported},{vendor_id}\r\n"
+
+
+def _csv_field(value):
+    """Quote a value the way csv.writer would if it contains a delimiter, quote or newline."""
+    if value is None:
+        return ""
+    value = str(value)
+    if any(c in value for c in ',"\r\n'):
+        return '"' + value.replace('"', '""') + '"'
+    return value
+
 
 class BACnetInteraction(Agent):
-    def __init__(self, proxy_id, csv_writer=None, **kwargs):
+    def __init__(self, proxy_id, csv_file=None, **kwargs):
         super(BACnetInteraction, self).__init__(**kwargs)
         self.proxy_id = proxy_id
-        self.csv_writer = csv_writer
+        self.csv_file = csv_file
+        # I-Am responses waiting to be written to the CSV file.
+        self._pending = []
+        # Monotonic time of the most recent I-Am response to the current
+        # who_is request, or None until the first one arrives.
+        self.last_activity = None
 
     def send_iam(self, low_device_id=None, high_device_id=None, address=None):
+        # Reset before sending: I-Am responses can arrive before the who_is
+        # RPC returns.
+        self.last_activity = None
         self.vip.rpc.call(self.proxy_id, "who_is",
                           low_device_id=low_device_id,
                           high_device_id=high_device_id,
@@ -55,9 +82,19 @@ class BACnetInteraction(Agent):
 
     @PubSub.subscribe('pubsub', topics.BACNET_I_AM)
     def iam_handler(self, peer, sender, bus,  topic, headers, message):
-        if self.csv_writer is not None:
-            self.csv_writer.writerow(message)
-        pprint(message)
+        self.last_activity = time.monotonic()
+        if self.csv_file is not None:
+            self._pending.append(CSV_ROW.format(**{name: _csv_field(message.get(name))
+                                                   for name in CSV_FIELD_NAMES}))
+            if len(self._pending) >= 50:
+                self.flush()
+        print(message)
+
+    def flush(self):
+        """Write any buffered I-Am responses to the CSV file."""
+        if self.csv_file is not None and self._pending:
+            self.csv_file.writelines(self._pending)
+            self._pending.clear()
 
 
 """
@@ -65,7 +102,40 @@ Simple utility to scrape device registers and write them to a configuration file
 """
 
 
-def main():
+# The agent connected by the last get_agent call, keyed by its proxy id.
+_agent_cache = {}
+
+
+def get_agent(proxy_id):
+    """Connect a :py:class:`BACnetInteraction` agent to the platform.
+
+    The keystore and connection are reused by later scans in the same process
+    that target the same proxy. Asking for a different proxy stops the
+    previously connected agent first.
+    """
+    agent = _agent_cache.get(proxy_id)
+    if agent is not None:
+        return agent
+    for old_agent in _agent_cache.values():
+        old_agent.core.stop()
+    _agent_cache.clear()
+
+    keystore = KeyStore()
+    agent = BACnetInteraction(proxy_id,
+                              address=get_address(),
+                              volttron_home=get_home(),
+                              publickey=keystore.public,
+                              secretkey=keystore.secret,
+                              enable_store=False)
+
+    event = gevent.event.Event()
+    gevent.spawn(agent.core.run, event)
+    event.wait()
+    _agent_cache[proxy_id] = agent
+    return agent
+
+
+def main(argv=None):
     # parse the command line arguments
     arg_parser = argparse.ArgumentParser(description=__doc__)
 
@@ -79,6 +149,11 @@ def main():
                             help="Time, in seconds, to wait for responses. Default: %(default)s",
                             default=5)
 
+    arg_parser.add_argument("--quiet-time", type=float, metavar='SECONDS', dest="quiet_time",
+                            help="Stop waiting once no response has arrived for this many seconds. "
+                                 "Default: %(default)s",
+                            default=0.5)
+
     arg_parser.add_argument("--proxy-id",
                             help="VIP IDENTITY of the BACnet proxy agent.",
                             default="platform.bacnet_proxy")
@@ -89,7 +164,7 @@ def main():
     arg_parser.add_argument("--debug", action="store_true",
                             help="Set the logger in debug mode")
 
-    args = arg_parser.parse_args()
+    args = arg_parser.parse_args(argv)
 
     core_logger = logging.getLogger("volttron.platform.vip.agent.core")
     core_logger.setLevel(logging.WARN)
@@ -99,34 +174,18 @@ def main():
         _log.setLevel(logging.DEBUG)
         core_logger.setLevel(logging.DEBUG)
 
-    _log.debug("initialization")
-    _log.debug("    - args: %r", args)
+    if _log.isEnabledFor(logging.DEBUG):
+        _log.debug("initialization")
+        _log.debug("    - args: %r", args)
 
-    csv_writer = None
     csv_file = None
 
     if args.csv_out is not None:
-        csv_file = open(args.csv_out, "w")
-        field_names = ["address",
-                       "device_id",
-                       "max_apdu_length",
-                       "segmentation_supported",
-                       "vendor_id"]
-        csv_writer = csv.DictWriter(csv_file, field_names)
-        csv_writer.writeheader()
-
-    keystore = KeyStore()
-    agent = BACnetInteraction(args.proxy_id,
-                              csv_writer=csv_writer,
-                              address=get_address(),
-                              volttron_home=get_home(),
-                              publickey=keystore.public,
-                              secretkey=keystore.secret,
-                              enable_store=False)
+        csv_file = open(args.csv_out, "w", buffering=1 << 20, newline='')
+        csv_file.write(CSV_HEADER)
 
-    event = gevent.event.Event()
-    gevent.spawn(agent.core.run, event)
-    event.wait()
+    agent = get_agent(args.proxy_id)
+    agent.csv_file = csv_file
 
     kwargs = {'address': args.address}
 
@@ -140,13 +199,27 @@ def main():
         _log.error("There is no BACnet proxy Agent running on the platform with the VIP IDENTITY {}".format(
             args.proxy_id))
     else:
-        gevent.sleep(args.timeout)
+        # Stop early once responses have been quiet for --quiet-time seconds
+        # after the first I-Am, but never wait longer than the requested
+        # timeout. With no responses at all the full timeout is used.
+        deadline = time.monotonic() + args.timeout
+        while time.monotonic() < deadline:
+            last_activity = agent.last_activity
+            if last_activity is not None and time.monotonic() - last_activity >= args.quiet_time:
+                break
+            gevent.sleep(0.1)
     finally:
+        agent.flush()
+        agent.csv_file = None
         if csv_file is not None:
+            csv_file.flush()
+            os.fsync(csv_file.fileno())
             csv_file.close()
 
 
-try:
-    main()
-except Exception as e:
-    _log.exception("an error has occurred: %s".format(repr(e)))
+if __name__ == '__main__':
+    try:
+        main()
+    except Exception as e:
+        _log.exception("an error has occurred: %s", e)
+        sys.exit(1)
@@ -25,6 +25,10 @@
 import datetime
 import logging
 import sys
+import time
+
+import gevent
+import gevent.lock
 
 from volttron.platform.vip.agent import Agent, PubSub
 from volttron.platform.agent import utils
@@ -40,6 +44,14 @@ class TestAgent(Agent):
     def __init__(self, config_path, **kwargs):
         super(TestAgent, self).__init__(**kwargs)
 
+        self._rpc_call = self.vip.rpc.call
+        self._get_point_target = ('platform.driver', 'get_point', 'chargepoint1')
+        self._set_point_target = ('platform.driver', 'set_point', 'chargepoint1')
+        # Limit how many heartbeat workers may be talking to the driver at once.
+        self._heartbeat_semaphore = gevent.lock.BoundedSemaphore(4)
+        self._timestamp_second = None
+        self._timestamp_string = None
+
         self.setting1 = 42
         self.default_config = {"setting1": self.setting1}
 
@@ -62,6 +74,13 @@ class TestAgent(Agent):
         # Test various RPC calls to the Chargepoint driver.
         counter += 1
         if counter > 1:
+            # Do the RPC work in its own greenlet so the pubsub callback
+            # returns immediately.
+            self.core.spawn(self.heartbeat_work)
+            counter = 0
+
+    def heartbeat_work(self):
+        with self._heartbeat_semaphore:
             # result = self.set_chargepoint_point('shedState', 0)
             # result = self.get_chargepoint_point('stationMacAddr')
             # result = self.get_chargepoint_point('Lat')
@@ -71,28 +90,41 @@ class TestAgent(Agent):
             # result = self.set_chargepoint_point('clearAlarms', True)
             # result = self.get_chargepoint_point('alarmType')
             # result = self.get_chargepoint_point('sessionID')
-            result = self.get_chargepoint_point('Status')
             # result = self.get_chargepoint_point('stationRightsProfile')
+            # Send the RPC and the publish together and wait for both so the
+            # round trips overlap.
+            status = self._rpc_call(*self._get_point_target, 'Status')
 
-            now = utils.format_timestamp(datetime.datetime.now())
+            now = self.current_timestamp()
             # Also publish a test pub/sub message just for kicks.
-            result = self.publish_message('test_topic/test_subtopic',
-                                          {
-                                              headers_mod.DATE: now,
-                                              headers_mod.TIMESTAMP: now
-                                          },
-                                          [{'property_1': 1, 'property_2': 2}, {'property_3': 3, 'property_4': 4}])
-
-            counter = 0
+            published = self.publish_message('test_topic/test_subtopic',
+                                             {
+                                                 headers_mod.DATE: now,
+                                                 headers_mod.TIMESTAMP: now
+                                             },
+                                             [{'property_1': 1, 'property_2': 2}, {'property_3': 3, 'property_4': 4}])
+
+            gevent.wait([status, published], timeout=10)
+            result = status.get(block=False)
+
+    def current_timestamp(self):
+        """Return the formatted local time, reformatting at most once per second."""
+        second = int(time.time())
+        if second != self._timestamp_second:
+            self._timestamp_second = second
+            self._timestamp_string = utils.format_timestamp(datetime.datetime.fromtimestamp(second))
+        return self._timestamp_string
 
     def get_chargepoint_point(self, point_name):
-        return self.vip.rpc.call('platform.driver', 'get_point', 'chargepoint1', point_name).get(timeout=10)
+        return self._rpc_call(*self._get_point_target, point_name).get(timeout=10)
 
     def set_chargepoint_point(self, point_name, value):
-        return self.vip.rpc.call('platform.driver', 'set_point', 'chargepoint1', point_name, value).get(timeout=10)
+        return self._rpc_call(*self._set_point_target, point_name, value).get(timeout=10)
 
     def publish_message(self, topic, headers, message):
-        return self.vip.pubsub.publish('pubsub', topic, headers=headers, message=message).get(timeout=10)
+        # Don't wait for the router to acknowledge the publish; callers that
+        # care can wait on the returned AsyncResult themselves.
+        return self.vip.pubsub.publish('pubsub', topic, headers=headers, message=message)
 
 def main(argv=sys.argv):
     """Main method called by the platform."""
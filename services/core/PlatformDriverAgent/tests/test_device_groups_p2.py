@@ -26,14 +26,18 @@
 a single pytest case for global platform driver settings.
 """
 
+import sys
+from collections import deque
+
 import pytest
 import gevent
 
 from volttron.platform import get_services_core
 from volttron.platform.agent.known_identities import PLATFORM_DRIVER
-from volttron.platform.vip.agent import Agent
+from volttron.platform.vip.agent import Agent, errors
 from volttron.platform.messaging import topics
 from volttron.platform.agent.utils import parse_timestamp_string
+from volttrontesting.utils.utils import poll_gevent_sleep
 
 fake_device_config = """
 {{
@@ -59,6 +63,11 @@ platform_driver_config = """
 }}
 """
 
+# The tests only ever use these expansions, so render them once.
+fake_device_config_group0 = fake_device_config.format(group=0)
+fake_device_config_group1 = fake_device_config.format(group=1)
+platform_driver_config_half_second = platform_driver_config.format(interval=0.5)
+
 registry_config_string = """Point Name,Volttron Point Name,Units,Units Details,Writable,Starting Value,Type,Notes
 Float,Float,F,-100 to 300,TRUE,50,float,CO2 Reading 0.00-2000.0 ppm
 FloatNoDefault,FloatNoDefault,F,-100 to 300,TRUE,,float,CO2 Reading 0.00-2000.0 ppm
@@ -67,13 +76,15 @@ FloatNoDefault,FloatNoDefault,F,-100 to 300,TRUE,,float,CO2 Reading 0.00-2000.0
 
 @pytest.mark.driver
 def test_add_remove_drivers(test_agent, subscriber_agent):
-    setup_config(test_agent, "config", platform_driver_config, interval=0.5)
-    setup_config(test_agent, "devices/fake0_0", fake_device_config, group=0)
-    setup_config(test_agent, "devices/fake0_1", fake_device_config, group=0)
-    setup_config(test_agent, "devices/fake0_2", fake_device_config, group=0)
-    setup_config(test_agent, "devices/fake1_0", fake_device_config, group=1)
-    setup_config(test_agent, "devices/fake1_1", fake_device_config, group=1)
-    setup_config(test_agent, "devices/fake1_2", fake_device_config, group=1)
+    setup_config(test_agent, "config", platform_driver_config_half_second).get()
+    # The driver hands out time slots within a group in arrival order, so
+    # devices of one group are added one at a time. Groups are counted
+    # separately, so the two groups' calls can overlap.
+    for index in range(3):
+        wait_for_results([
+            setup_config(test_agent, "devices/fake0_{}".format(index), fake_device_config_group0),
+            setup_config(test_agent, "devices/fake1_{}".format(index), fake_device_config_group1),
+        ])
 
     subscriber_agent.reset_results()
 
@@ -89,8 +100,10 @@ def test_add_remove_drivers(test_agent, subscriber_agent):
     assert results["devices/fake1_1/all"] == 6
     assert results["devices/fake1_2/all"] == 7
 
-    remove_config(test_agent, "devices/fake0_1")
-    remove_config(test_agent, "devices/fake1_1")
+    wait_for_results([
+        remove_config(test_agent, "devices/fake0_1"),
+        remove_config(test_agent, "devices/fake1_1"),
+    ])
 
     subscriber_agent.reset_results()
 
@@ -107,8 +120,10 @@ def test_add_remove_drivers(test_agent, subscriber_agent):
     assert "devices/fake0_1/all" not in results
     assert "devices/fake1_1/all" not in results
 
-    setup_config(test_agent, "devices/fake0_1", fake_device_config, group=0)
-    setup_config(test_agent, "devices/fake1_1", fake_device_config, group=1)
+    wait_for_results([
+        setup_config(test_agent, "devices/fake0_1", fake_device_config_group0),
+        setup_config(test_agent, "devices/fake1_1", fake_device_config_group1),
+    ])
 
     subscriber_agent.reset_results()
 
@@ -128,25 +143,60 @@ def test_add_remove_drivers(test_agent, subscriber_agent):
 def get_normalized_time_offset(time_string):
     """Parses time_string and returns timeslot of the the value assuming 1 second publish interval
     and 0.1 second driver_scrape_interval."""
+    # The first fractional digit of an ISO timestamp is the tenth of a second
+    # we are after, so avoid a full parse when it is present.
+    dot = time_string.find(".")
+    if dot != -1 and time_string[dot + 1:dot + 2].isdigit():
+        return int(time_string[dot + 1])
     ts = parse_timestamp_string(time_string)
     return ts.microsecond // 100000
 
 
+# Topics of the form devices/fake{group}_{index}/all are stored in a fixed
+# slot array instead of a dict; anything else falls back to publish_results.
+DEVICE_TOPIC_PREFIX = "devices/fake"
+DEVICE_TOPIC_LENGTH = len("devices/fake0_0/all")
+DEVICE_SLOTS_PER_GROUP = 4
+
+
 class _subscriber_agent(Agent):
     def __init__(self, **kwargs):
         super(_subscriber_agent, self).__init__(**kwargs)
         self.publish_results = {}
+        self._slots = [None] * (2 * DEVICE_SLOTS_PER_GROUP)
+        # Recent (topic, offset) pairs, printed in one go on teardown instead
+        # of writing to stdout from the subscription callback.
+        self._log_ring = deque(maxlen=1024)
 
     def reset_results(self):
         print("Resetting results")
         self.publish_results.clear()
+        self._slots = [None] * len(self._slots)
 
     def get_results(self):
-        return self.publish_results.copy()
+        # Hand back the collected results and start fresh rather than copying.
+        results, self.publish_results = self.publish_results, {}
+        slots, self._slots = self._slots, [None] * len(self._slots)
+        for slot, offset in enumerate(slots):
+            if offset is not None:
+                group, index = divmod(slot, DEVICE_SLOTS_PER_GROUP)
+                results["{}{}_{}/all".format(DEVICE_TOPIC_PREFIX, group, index)] = offset
+        return results
 
     def add_result(self, peer, sender, bus, topic, headers, message):
-        print("message published to", topic)
-        self.publish_results[topic] = get_normalized_time_offset(headers["TimeStamp"])
+        offset = get_normalized_time_offset(headers["TimeStamp"])
+        self._log_ring.append((topic, offset))
+        if len(topic) == DEVICE_TOPIC_LENGTH and topic.startswith(DEVICE_TOPIC_PREFIX) and topic.endswith("/all"):
+            group, index = topic[12], topic[14]
+            if group in "01" and index in "0123":
+                self._slots[int(group) * DEVICE_SLOTS_PER_GROUP + int(index)] = offset
+                return
+        self.publish_results[sys.intern(topic)] = offset
+
+    def dump_log(self):
+        print("\n".join("message published to {} (offset {})".format(topic, offset)
+                        for topic, offset in self._log_ring))
+        self._log_ring.clear()
 
 
 @pytest.fixture(scope="module")
@@ -162,6 +212,7 @@ def subscriber_agent(volttron_instance):
 
     yield agent
 
+    agent.dump_log()
     agent.core.stop()
 
 
@@ -198,7 +249,15 @@ def test_agent(volttron_instance):
         agent_dir=get_services_core("PlatformDriverAgent"), config_file={}, start=True
     )
 
-    gevent.sleep(10)  # wait for the agent to start and start the devices
+    # wait for the agent to start instead of sleeping for a fixed period
+    def driver_ready():
+        try:
+            md_agent.vip.rpc.call(PLATFORM_DRIVER, "health.get_status").get(timeout=1)
+        except (errors.Unreachable, gevent.Timeout):
+            return False
+        return True
+
+    assert poll_gevent_sleep(10, driver_ready)
 
     yield md_agent
 
@@ -207,20 +266,31 @@ def test_agent(volttron_instance):
 
 
 def setup_config(test_agent, config_name, config_string, **kwargs):
-    config = config_string.format(**kwargs)
+    """Store a configuration and return the pending RPC result without waiting on it."""
+    config = config_string.format(**kwargs) if kwargs else config_string
     print("Adding", config_name, "to store")
-    test_agent.vip.rpc.call(
+    return test_agent.vip.rpc.call(
         "config.store",
         "set_config",
         PLATFORM_DRIVER,
         config_name,
         config,
         config_type="json",
-    ).get()
+    )
 
 
 def remove_config(test_agent, config_name):
+    """Delete a configuration and return the pending RPC result without waiting on it."""
     print("Removing", config_name, "from store")
-    test_agent.vip.rpc.call(
+    return test_agent.vip.rpc.call(
         "config.store", "delete_config", PLATFORM_DRIVER, config_name
-    ).get()
+    )
+
+
+def wait_for_results(results, timeout=10):
+    """Wait for RPC calls that were all sent up front so their round trips overlap.
+
+    Only batch calls whose completion order does not matter.
+    """
+    for result in results:
+        result.get(timeout=timeout)
@@ -27,7 +27,9 @@ import gevent
 from gevent import pywsgi
 
 from volttron.platform import get_services_core
-from volttrontesting.utils.utils import get_rand_http_address
+from volttron.platform.jsonrpc import RemoteError
+from volttron.platform.vip.agent import errors
+from volttrontesting.utils.utils import get_rand_http_address, poll_gevent_sleep
 
 from volttron.platform.agent.known_identities import CONFIGURATION_STORE, PLATFORM_DRIVER
 
@@ -86,15 +88,27 @@ def agent(request, volttron_instance):
                        restful_csv_string,
                        "csv").get(timeout=10)
 
+    server = pywsgi.WSGIServer((ip, int(port)), handle)
+    server.start()
+
     platform_uuid = volttron_instance.install_agent(
         agent_dir=get_services_core("PlatformDriverAgent"),
         config_file={},
         start=True)
     print("agent id: ", platform_uuid)
-    gevent.sleep(2)  # wait for the agent to start and start the devices
 
-    server = pywsgi.WSGIServer((ip, int(port)), handle)
-    server.start()
+    # wait for the agent to start and start the devices
+    def device_ready():
+        try:
+            agent.vip.rpc.call(PLATFORM_DRIVER,
+                               'get_point',
+                               'campus/building/unit',
+                               'test_point').get(timeout=1)
+        except (errors.Unreachable, RemoteError, gevent.Timeout):
+            return False
+        return True
+
+    assert poll_gevent_sleep(10, device_ready)
 
     def stop():
         volttron_instance.stop_agent(platform_uuid)
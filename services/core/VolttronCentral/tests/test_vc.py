@@ -22,6 +22,7 @@
 # ===----------------------------------------------------------------------===
 # }}}
 from __future__ import annotations
+from types import SimpleNamespace
 from unittest import mock
 
 import pytest
@@ -39,43 +40,78 @@ from volttron.platform import jsonapi, jsonrpc, get_services_core
 from volttron.platform.web.websocket import VolttronWebSocket
 from volttrontesting.utils.web_utils import get_test_web_env
 from volttron.platform.vip.agent import Agent
+from services.core.VolttronCentral.volttroncentral import agent as vc_agent_module
 from services.core.VolttronCentral.volttroncentral.agent import VolttronCentralAgent
 import gevent
-import grequests
 
+# Request payloads shared by the authorization tests; copy before mutating.
+_AUTH_TOKEN = '{"refresh_token": "super_secret_refresh_token", "access_token": "super_secret_access_token"}'
+_LIST_PLATFORMS = jsonrpc.json_method("12345", "list_platforms", None, None)
 
-@pytest.fixture
-def mock_vc():
-    VolttronCentralAgent.__bases__ = (AgentMock.imitate(Agent, VolttronCentralAgent()),)
+
+def mock_vc_base():
+    """Swap VolttronCentralAgent's base for AgentMock, building the spec instance only the first time."""
+    if VolttronCentralAgent.__bases__ != (AgentMock,):
+        VolttronCentralAgent.__bases__ = (AgentMock.imitate(Agent, VolttronCentralAgent()),)
+
+
+@pytest.fixture(scope="module")
+def mock_vc_module():
+    mock_vc_base()
     vc = VolttronCentralAgent()
     vc._configure("test_config", "NEW", {})
     yield vc
 
 
 @pytest.fixture
+def mock_vc(mock_vc_module):
+    # The agent is shared across the module; only the sessions need resetting per test.
+    mock_vc_module._authenticated_sessions.clear()
+    yield mock_vc_module
+
+
+@pytest.fixture(scope="module")
 def mock_jsonrpc_env(path="jsonrpc", input_data=None, method="POST"):
     yield get_test_web_env(path, input_data, method=method)
 
 
-@pytest.fixture
-def mock_response(monkeypatch):
+class _MockResp:
+    """Stand-in for a sent grequests request to the web auth endpoint."""
+    __slots__ = ('ok', 'text')
+
+    def __init__(self, ok, text):
+        self.ok = ok
+        self.text = text
+
+    def send(self) -> _MockResp:
+        return self
+
+    @property
+    def response(self) -> _MockResp:
+        return self
+
+
+_RESP_OK = _MockResp(True, _AUTH_TOKEN)
+_RESP_BAD = _MockResp(False, "invalid username/password")
+
+
+@pytest.fixture(scope="module")
+def mock_response():
     def mock_resp(*args, **kwargs):
-        class MockResp:
-            def __init__(self):
-                mock_args = kwargs['json']
-                if mock_args['username'] == 'test' and mock_args['password'] == 'test':
-                    self.ok = True
-                    self.text = '{"refresh_token": "super_secret_refresh_token", "access_token": "super_secret_access_token"}'
-                else:
-                    self.ok = False
-                    self.text = "invalid username/password"
-            def send(self) -> MockResp:
-                return self
-            @property
-            def response(self) -> MockResp:
-                return self
-        return MockResp()
-    monkeypatch.setattr(grequests, "post", mock_resp)
+        mock_args = kwargs['json']
+        if mock_args['username'] == 'test' and mock_args['password'] == 'test':
+            return _RESP_OK
+        return _RESP_BAD
+    # Swap only the grequests reference used by the VC agent for a plain
+    # in-process stub instead of patching the shared grequests module.
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(vc_agent_module, "grequests", SimpleNamespace(post=mock_resp))
+        yield
+
+
+def jsonrpc_batch(vc, env, batch):
+    """Dispatch a JSON-RPC 2.0 batch (a list of requests) against the agent's single-request handler."""
+    return [vc.jsonrpc(env, data) for data in batch]
 
 
 @pytest.mark.vc
@@ -84,17 +120,16 @@ def test_jsonrpc_get_authorization(mock_response, mock_vc, mock_jsonrpc_env, mon
     mock_claims = {"groups": ["test_admin"]}
     mock_vc.vip.web.configure_mock(**{"get_user_claims.return_value": mock_claims})
 
-    data = jsonrpc.json_method("12345", "get_authorization", {"username": "test", "password": "test"}, None)
+    batch = [jsonrpc.json_method("1", "get_authorization", {"username": "test", "password": "test"}, None),
+             jsonrpc.json_method("2", "get_authorization", {"username": "test", "password": "nah"}, None)]
 
     assert len(mock_vc._authenticated_sessions._sessions) == 0
 
-    mock_vc.jsonrpc(mock_jsonrpc_env, data)
+    responses = jsonrpc_batch(mock_vc, mock_jsonrpc_env, batch)
 
     assert len(mock_vc._authenticated_sessions._sessions) == 1
-
-    data = jsonrpc.json_method("12345", "get_authorization", {"username": "test", "password": "nah"}, None)
-    response = mock_vc.jsonrpc(mock_jsonrpc_env, data)
-    assert response['error']['message'] == "Invalid username/password specified."
+    assert 'error' not in responses[0]
+    assert responses[1]['error']['message'] == "Invalid username/password specified."
 
 
 @pytest.fixture
@@ -109,30 +144,32 @@ def mock_vc_jsonrpc(mock_response, mock_vc, mock_jsonrpc_env, monkeypatch):
     yield mock_vc
 
 
-@pytest.fixture
-def mock_websocket(mock_vc):
-    mock_vc.vip.web.configure_mock(**{"register_websocket.return_value": VolttronWebSocket})
+@pytest.fixture(scope="module")
+def mock_websocket(mock_vc_module):
+    mock_vc_module.vip.web.configure_mock(**{"register_websocket.return_value": VolttronWebSocket})
     #.vip.web.configure_mock(**{"register_websocket.return_value": VolttronWebSocket})
 
 
 @pytest.mark.vc
 def test_jsonrpc_is_authorized(mock_vc_jsonrpc, mock_jsonrpc_env):
 
-    data = jsonrpc.json_method("12345", "list_platforms", None, None)
-    data['authorization'] = '{"refresh_token": "super_secret_refresh_token", "access_token": "super_secret_access_token"}'
+    data = dict(_LIST_PLATFORMS)
+    data['authorization'] = _AUTH_TOKEN
     response = mock_vc_jsonrpc.jsonrpc(mock_jsonrpc_env, data)
-    assert len(response['result']) is 0 and type(response['result']) is list
+    result = response['result']
+    assert isinstance(result, list) and not result
 
 
 @pytest.mark.vc
 def test_jsonrpc_is_unauthorized(mock_vc_jsonrpc, mock_jsonrpc_env):
-    data = jsonrpc.json_method("12345", "list_platforms", None, None)
+    data = dict(_LIST_PLATFORMS)
     data['authorization'] = "really_bad_access_token"
     response = mock_vc_jsonrpc.jsonrpc(mock_jsonrpc_env, data)
     assert response['error']['message'] == "Invalid authentication token"
 
 
 @pytest.mark.vc
+@pytest.mark.serial
 def test_installable(volttron_instance_web):
     """
     Test the default configuration file included with the agent
@@ -1,18 +1,45 @@
 import requests
+from requests.adapters import HTTPAdapter
+
+_http_session = None
+
+
+def get_http_session():
+    """ Return a requests session shared by all APITester instances.
+
+    Reusing one pooled session keeps the connection to the web server
+    alive between json-rpc calls instead of reconnecting on every post.
+    """
+    global _http_session
+    if _http_session is None:
+        _http_session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=50, pool_maxsize=50)
+        _http_session.mount('http://', adapter)
+        _http_session.mount('https://', adapter)
+    return _http_session
 
 
 class APITester:
-    def __init__(self, wrapper, username='admin', password='admin'):
+    def __init__(self, wrapper, username='admin', password='admin',
+                 session=None):
         """
         :param url:string:
             The jsonrpc endpoint for posting data to.
         :param username:
         :param password:
+        :param session:
+            Optional requests.Session, defaults to the shared pooled session.
         """
         self._wrapper = wrapper
         self._url = wrapper.jsonrpc_endpoint
         self._username = username
         self._password = password
+        self._session = session if session is not None else get_http_session()
+        if wrapper.ssl_auth:
+            self._verify = wrapper.certsobj.cert_file(
+                wrapper.certsobj.root_ca_name)
+        else:
+            self._verify = False
 
         self._auth_token = None
         self._auth_token = self.get_auth_token()
@@ -28,12 +55,7 @@ class APITester:
 
         print('Posting: {}'.format(data))
 
-        if self._wrapper.ssl_auth:
-            r = requests.post(self._url, json=data,
-                              verify=self._wrapper.certsobj.cert_file(self._wrapper.certsobj.root_ca_name))
-        else:
-            r = requests.post(self._url, json=data,
-                              verify=False)
+        r = self._session.post(self._url, json=data, verify=self._verify)
         validate_response(r)
 
         rpcjson = r.json()
@@ -99,3 +99,38 @@ def test_file_watcher(volttron_instance, publish_agent):
     print(publish_agent.callback.call_args)
     volttron_instance.remove_agent(watcher_uuid)
     os.remove(test_path)
+
+
+def test_file_watcher_batch_publish(volttron_instance, publish_agent):
+    test_path = os.path.join(get_home(), "test_batch.txt")
+
+    with open(test_path, "w") as textfile:
+        textfile.write("test_data\n")
+
+    test_config = {
+        "files": [
+            {
+                "file": test_path,
+                "topic": "platform/test_topic"
+            }
+        ],
+        "batch_publish": True
+    }
+
+    publish_agent.callback.reset_mock()
+    watcher_uuid = volttron_instance.install_agent(
+        agent_dir=get_ops("FileWatchPublisher"),
+        config_file=test_config,
+        start=True,
+        vip_identity="health_test")
+
+    with open(test_path, "a") as textfile:
+        textfile.write("line one\nline two\n")
+
+    gevent.sleep(2)
+
+    assert publish_agent.callback.call_count == 1
+    message = publish_agent.callback.call_args[0][5]
+    assert message["lines"] == ["line one", "line two"]
+    volttron_instance.remove_agent(watcher_uuid)
+    os.remove(test_path)
@@ -28,11 +28,14 @@
 
 import gevent
 import logging
-import os.path
+import os
+import stat
 import sys
 
 from datetime import datetime
-from volttron.platform.agent.utils import watch_file_with_fullpath
+from watchdog_gevent import Observer
+
+from volttron.utils import AbsolutePathFileReloader
 from volttron.platform.vip.agent import Agent, Core
 from volttron.platform.agent import utils
 
@@ -77,26 +80,34 @@ class FileWatchPublisher(Agent):
                     "file": "/home/volttron/tempfile.txt",
                     "topic": "temp/filepublisher",
                 }
-            ]
+            ],
+            "batch_publish": false
         }
     """
     def __init__(self, config, **kwargs):
         super(FileWatchPublisher, self).__init__(**kwargs)
         self.config = config
+        self.batch_publish = bool(config.get("batch_publish", False))
         items = config.get("files")
         assert isinstance(items, list)
         self.file_topic = {}
         self.file_end_position = {}
-        for item in self.config.get("files"):
+        # Open handles of the watched files, kept across change notifications.
+        self._handles = {}
+        self._observer = None
+        self.files_to_watch = []
+        for item in items:
             file = item["file"]
-            self.file_topic[file] = item["topic"]
-            if os.path.isfile(file):
-                with open(file, 'r') as f:
-                    self.file_end_position[file] = self.get_end_position(f)
-            else:
+            try:
+                file_stat = os.stat(file)
+            except OSError:
+                file_stat = None
+            if file_stat is None or not stat.S_ISREG(file_stat.st_mode):
                 _log.error("File " + file + " does not exists. Ignoring this file.")
-                items.remove(item)
-        self.files_to_watch = items
+                continue
+            self.file_topic[file] = item["topic"]
+            self.file_end_position[file] = file_stat.st_size
+            self.files_to_watch.append(item)
 
     @Core.receiver('onstart')
     def starting(self, sender, **kwargs):
@@ -105,27 +116,93 @@ class FileWatchPublisher(Agent):
             _log.error("No file to watch and publish. Stopping "+self.__class__.__name__+" agent.")
             gevent.spawn_later(3, self.core.stop)
         else:
+            # A single observer watches every configured file rather than
+            # starting one observer per file.
+            self._observer = Observer()
             for item in self.files_to_watch:
                 file = item["file"]
-                self.core.spawn(watch_file_with_fullpath, file, self.read_file)
+                self._handles[file] = open(file, 'r')
+                reader = self.make_reader(file, item["topic"])
+                self._observer.schedule(AbsolutePathFileReloader(file, reader), os.path.dirname(file))
+            self._observer.start()
+
+    @Core.receiver('onstop')
+    def stopping(self, sender, **kwargs):
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer = None
+        for f in self._handles.values():
+            f.close()
+        self._handles.clear()
+
+    def make_reader(self, file, topic):
+        """
+        Build the change callback for a single watched file. The topic,
+        publish mode and bound methods are captured once here instead of
+        being looked up on every notification.
+        """
+        get_handle = self.get_handle
+        get_end_position = self.get_end_position
+        end_position = self.file_end_position
+        publish = self.vip.pubsub.publish
+        publish_file = self.publish_file
+        batch_publish = self.batch_publish
+
+        def reader(_file):
+            _log.debug('loading file %s', file)
+            f = get_handle(file)
+            f.seek(end_position[file])
+            lines = [line[:-1] if line[-1:] == '\n' else line for line in f]
+            end_position[file] = get_end_position(f)
+            if not lines:
+                return
+
+            # All lines read in one pass share a single timestamp.
+            timestamp = datetime.utcnow().isoformat() + 'Z'
+            if batch_publish:
+                message = {'timestamp': timestamp,
+                           'lines': lines}
+                _log.debug('publishing %s lines on topic %s', len(lines), topic)
+                publish(peer="pubsub", topic=topic, message=message)
+            else:
+                for line in lines:
+                    publish_file(line, topic, timestamp)
+
+        return reader
 
     def read_file(self, file):
-        _log.debug('loading file %s', file)
-        with open(file, 'r') as f:
-            f.seek(self.file_end_position[file])
-            for line in f:
-                self.publish_file(line.strip(),self.file_topic[file])
-            self.file_end_position[file] = self.get_end_position(f)
-
-    def publish_file(self, line, topic):
-        message = {'timestamp':  datetime.utcnow().isoformat() + 'Z',
+        self.make_reader(file, self.file_topic[file])(file)
+
+    def publish_file(self, line, topic, timestamp=None):
+        if timestamp is None:
+            timestamp = datetime.utcnow().isoformat() + 'Z'
+        message = {'timestamp': timestamp,
                    'line': line}
-        _log.debug('publishing message {} on topic {}'.format(message, topic))
+        if _log.isEnabledFor(logging.DEBUG):
+            _log.debug('publishing message %s on topic %s', message, topic)
         self.vip.pubsub.publish(peer="pubsub", topic=topic, message=message)
 
+    def get_handle(self, file):
+        """
+        Return the open handle for file, reopening it if the file has been
+        replaced (e.g. log rotation) and rewinding if it has been truncated.
+        """
+        f = self._handles.get(file)
+        try:
+            file_stat = os.stat(file)
+        except OSError:
+            file_stat = None
+        if f is None or (file_stat is not None and os.fstat(f.fileno()).st_ino != file_stat.st_ino):
+            if f is not None:
+                f.close()
+                self.file_end_position[file] = 0
+            f = self._handles[file] = open(file, 'r')
+        if file_stat is not None and file_stat.st_size < self.file_end_position[file]:
+            self.file_end_position[file] = 0
+        return f
+
     def get_end_position(self, f):
-        f.seek(0, 2)
-        return f.tell()
+        return os.fstat(f.fileno()).st_size
 
 
 def main(argv=sys.argv):
@@ -22,25 +22,21 @@
 # ===----------------------------------------------------------------------===
 # }}}
 
-NOBLOCK = 1
-SNDMORE = 2
-RCVMORE = 13
+import sys
 
-POLLIN = 1
-POLLOUT = 2
+__all__ = ('NOBLOCK', 'SNDMORE', 'RCVMORE',
+           'POLLIN', 'POLLOUT',
+           'PUB', 'SUB', 'DEALER', 'ROUTER', 'PULL', 'PUSH', 'XPUB',
+           'EAGAIN', 'EINVAL', 'EHOSTUNREACH', 'EPROTONOSUPPORT',
+           'ZMQError', 'Again', 'Context', 'Poller', 'Socket', 'green')
 
-PUB = 1
-SUB = 2
-DEALER = 5
-ROUTER = 6
-PULL = 7
-PUSH = 8
-XPUB = 9
+NOBLOCK, SNDMORE, RCVMORE = 1, 2, 13
 
-EAGAIN = 11
-EINVAL = 22
-EHOSTUNREACH = 113
-EPROTONOSUPPORT = 93
+POLLIN, POLLOUT = 1, 2
+
+PUB, SUB, DEALER, ROUTER, PULL, PUSH, XPUB = 1, 2, 5, 6, 7, 8, 9
+
+EAGAIN, EINVAL, EHOSTUNREACH, EPROTONOSUPPORT = 11, 22, 113, 93
 
 
 class ZMQError(Exception):
@@ -50,8 +46,14 @@ class Again(ZMQError):
     pass
 
 class Context:
-    def instance(self):
-        return Context()
+    _instance = None
+
+    @classmethod
+    def instance(cls, io_threads=1):
+        # Like pyzmq, return one process-wide context.
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
 
 
 class Poller:
@@ -63,8 +65,17 @@ class Poller:
 
 
 class Socket:
+    __slots__ = ('_type',)
+    _instances = {}
+
     def __new__(cls, socket_type, context=None):
-        return object.__new__(cls, socket_type, context=context)
+        # One shared, stateless instance per socket type.
+        inst = cls._instances.get(socket_type)
+        if inst is None:
+            inst = object.__new__(cls)
+            inst._type = socket_type
+            cls._instances[socket_type] = inst
+        return inst
 
     def bind(self, addr):
         pass
@@ -88,11 +99,11 @@ class Socket:
 
     @property
     def context(self):
-        return Context()
+        return Context.instance()
 
     @property
     def type(self):
-        return 0
+        return self._type
 
     @context.setter
     def context(self, value):
@@ -122,4 +133,5 @@ class Socket:
     def getsockopt(self, option):
         return 0
 
-green = __import__('sys').modules[__name__]
+# zmq.green exposes the same API; alias it to this module.
+green = sys.modules[__name__]
@@ -22,54 +22,148 @@
 # ===----------------------------------------------------------------------===
 # }}}
 
+from bisect import bisect_right
+
 import numpy as np
 
+# Segment pairs above which intersection tests are narrowed down with
+# bounding boxes of _AABB_CHUNK consecutive segments.
+_AABB_MIN_PAIRS = 4096
+_AABB_CHUNK = 16
+
+# Keys of the dict returned by PolyLine.compare, one per supply/demand
+# bound pair (S/D: supply/demand, Q/P: quantity/price, n/x: min/max).
+_COMPARE_KEYS = ('SQn,DQn', 'SQn,DQx', 'SQx,DQn', 'SQx,DQx',
+                 'SPn,DPn', 'SPn,DPx', 'SPx,DPn', 'SPx,DPx')
+
+
 def cmp(a, b):
     return (a > b) - (a < b)
 
+
+def _segment_hits(xs_1, ys_1, dx_1, dy_1, xs_2, ys_2, columns=None):
+    """
+    Boolean matrix of PolyLine.segment_intersects for every segment of the
+    first curve against every segment of the second, or only the segments
+    of the second curve listed in columns.
+    """
+    ax = xs_1[:-1, None]
+    ay = ys_1[:-1, None]
+    bx = xs_1[1:, None]
+    by = ys_1[1:, None]
+    bxax = dx_1[:, None]
+    byay = dy_1[:, None]
+    if columns is None:
+        cx = xs_2[None, :-1]
+        cy = ys_2[None, :-1]
+        dx = xs_2[None, 1:]
+        dy = ys_2[None, 1:]
+    else:
+        cx = xs_2[None, columns]
+        cy = ys_2[None, columns]
+        dx = xs_2[None, columns + 1]
+        dy = ys_2[None, columns + 1]
+
+    # PolyLine.ccw for each of the four point triples
+    ccw_acd = (dy - ay) * (cx - ax) > (cy - ay) * (dx - ax)
+    ccw_bcd = (dy - by) * (cx - bx) > (cy - by) * (dx - bx)
+    ccw_abc = (cy - ay) * bxax > byay * (cx - ax)
+    ccw_abd = (dy - ay) * bxax > byay * (dx - ax)
+    hits = (ccw_acd != ccw_bcd) & (ccw_abc != ccw_abd)
+
+    # segments sharing an end point also count as intersecting
+    hits |= (ax == cx) & (ay == cy)
+    hits |= (ax == dx) & (ay == dy)
+    hits |= (bx == cx) & (by == cy)
+    hits |= (bx == dx) & (by == dy)
+    return hits
+
+
+def _chunk_boxes(xs, ys):
+    """
+    Bounding boxes (x_min, y_min, x_max, y_max) of each run of _AABB_CHUNK
+    consecutive segments of a curve.
+    """
+    starts = np.arange(0, len(xs) - 1, _AABB_CHUNK)
+    x_min = np.minimum.reduceat(np.minimum(xs[:-1], xs[1:]), starts)
+    y_min = np.minimum.reduceat(np.minimum(ys[:-1], ys[1:]), starts)
+    x_max = np.maximum.reduceat(np.maximum(xs[:-1], xs[1:]), starts)
+    y_max = np.maximum.reduceat(np.maximum(ys[:-1], ys[1:]), starts)
+    return x_min, y_min, x_max, y_max
+
 class PolyLine:
+    # dtype of the cached xs/ys arrays used for interpolation and the
+    # intersection tests. A subclass may use np.float32 to halve their size
+    # when curves do not need double precision.
+    DTYPE = np.float64
+
     def __init__(self):
         self.points = []
+        # Negated y of each point, parallel to self.points, so the insertion
+        # index for the descending-y order can be found with a bisect.
+        self._neg_ys = []
+        # (x, y) of every point, for constant time duplicate checks.
+        self._seen = set()
         self.xs = None
         self.ys = None
+        self._edge_cache = None
         self.xsSortedByY = None
         self.ysSortedByY = None
         self._min_x = None
         self._max_x = None
         self._min_y = None
         self._max_y = None
+        # Number of points with a None coordinate, kept up to date by add().
+        self._none_count = 0
 
     def add(self, point):
         if self.points is None:
             self.points = []
-        if len(self.points) > 0:
-            for p in reversed(self.points):
-                if p.x == point.x and p.y == point.y:
-                    return
-        doSort = False
-        # if len(self.points) > 0 and point.y < self.points[-1].y:
-        if len(self.points) > 0:
-            doSort = True
-
-        self.points.append(point)
-        if doSort:
-            self.points.sort(key=lambda tup: tup[1], reverse=True)
+            self._neg_ys = []
+            self._seen = set()
+            self._none_count = 0
+        key = (point.x, point.y)
+        if key in self._seen:
+            return
+        self._seen.add(key)
+        # points are kept sorted by descending y; equal y values keep their
+        # insertion order, so the new point goes after any existing ones.
+        neg_y = -point.y
+        neg_ys = self._neg_ys
+        if not neg_ys or neg_y >= neg_ys[-1]:
+            # Curves are usually built from the highest price down, so most
+            # points belong at the end and need no search.
+            self.points.append(point)
+            neg_ys.append(neg_y)
+        else:
+            i = bisect_right(neg_ys, neg_y)
+            self.points.insert(i, point)
+            neg_ys.insert(i, neg_y)
         self.xs = None
         self.ys = None
-        if point.x is not None and point.y is not None:
-            self._min_x = PolyLine.min(self._min_x, point.x)
-            self._min_y = PolyLine.min(self._min_y, point.y)
-            self._max_x = PolyLine.max(self._max_x, point.x)
-            self._max_y = PolyLine.max(self._max_y, point.y)
+        self._edge_cache = None
+        if point.x is None or point.y is None:
+            self._none_count += 1
+        elif self._min_x is None:
+            self._min_x = self._max_x = point.x
+            self._min_y = self._max_y = point.y
+        else:
+            x = point.x
+            y = point.y
+            if x < self._min_x:
+                self._min_x = x
+            elif x > self._max_x:
+                self._max_x = x
+            if y < self._min_y:
+                self._min_y = y
+            elif y > self._max_y:
+                self._max_y = y
 
     def contains_none(self):
-        result = False
-        if self.points is not None and len(self.points) > 0:
-            for p in self.points:
-                if p.x is None or p.y is None:
-                    result = True
-        return result
+        return self._none_count > 0
 
+    # min/max/sum are None-safe helpers kept for PolyLineFactory and other
+    # callers; add() tracks its bounds inline.
     @staticmethod
     def min(x1, x2):
         if x1 is None:
@@ -95,6 +189,11 @@ class PolyLine:
         return x1 + x2
 
     def x(self, y):
+        """
+        Interpolate the x value at y. y may also be a sequence or
+        array, in which case an array is returned with NaN where there is
+        no value.
+        """
         if not self.points:
             return None
         if y is None:
@@ -105,9 +204,16 @@ class PolyLine:
         # ys = self.ys if ascending else self.ys[::-1]
         # xs = self.xs if ascending else self.xs[::-1]
         r = np.interp(y, self.ysSortedByY, self.xsSortedByY)
+        if np.ndim(r):
+            return r
         return None if np.isnan(r) else r
 
     def y(self, x):
+        """
+        Interpolate the y value at x. x may also be a sequence or
+        array, in which case an array is returned with NaN where there is
+        no value.
+        """
         if not self.points:
             return None
         if x is None:
@@ -118,22 +224,19 @@ class PolyLine:
         # ys = self.ys if ascending else self.ys[::-1]
         # xs = self.xs if ascending else self.xs[::-1]
         r = np.interp(x, self.xs, self.ys)
+        if np.ndim(r):
+            return r
         return None if np.isnan(r) else r
 
-    # probably replace w/ zip()
     def vectorize(self):
         if not self.points:
             return None, None
-        if (self.xs == None or self.ys == None):
-            xs = [None] * len(self.points)
-            ys = [None] * len(self.points)
-            c = 0
-            for p in self.points:
-                xs[c] = p.x
-                ys[c] = p.y
-                c += 1
-            self.xs = xs
-            self.ys = ys
+        if self.xs is None or self.ys is None:
+            # Built once per change to the points and reused by every x()/y()
+            # call, so np.interp does not have to convert lists each time.
+            points = np.array(self.points, dtype=self.DTYPE)
+            self.xs = points[:, 0]
+            self.ys = points[:, 1]
             if self.ys[0] < self.ys[-1]:
                 self.xsSortedByY = self.xs
                 self.ysSortedByY = self.ys
@@ -142,6 +245,16 @@ class PolyLine:
                 self.ysSortedByY = self.ys[::-1]
         return self.xs, self.ys
 
+    def edges(self):
+        """
+        Return the x and y extent of each segment as arrays, cached until the
+        next add() so repeated intersection queries reuse them.
+        """
+        if self._edge_cache is None:
+            xs, ys = self.vectorize()
+            self._edge_cache = (xs[1:] - xs[:-1], ys[1:] - ys[:-1])
+        return self._edge_cache
+
     def tuppleize(self):
         if not self.points:
             return None
@@ -186,80 +299,157 @@ class PolyLine:
 
     @staticmethod
     def segment_intersects(l1, l2):
-        if l1[0][0] is None or l1[0][1] is None or l1[1][0] is None or l1[1][1] is None:
+        # Coordinates are unpacked once and the ccw tests inlined, as this is
+        # called for every segment pair when scanning curves.
+        (ax, ay), (bx, by) = l1
+        (cx, cy), (dx, dy) = l2
+        if ax is None or ay is None or bx is None or by is None:
             return False
-        if l2[0][0] is None or l2[0][1] is None or l2[1][0] is None or l2[1][1] is None:
+        if cx is None or cy is None or dx is None or dy is None:
             return False
-        if (PolyLine.ccw(l1[0], l2[0], l2[1]) != PolyLine.ccw(l1[1], l2[0], l2[1])
-            and PolyLine.ccw(l1[0], l1[1], l2[0]) != PolyLine.ccw(l1[0], l1[1], l2[1])):
+        if (((dy - ay) * (cx - ax) > (cy - ay) * (dx - ax)) != ((dy - by) * (cx - bx) > (cy - by) * (dx - bx))
+            and ((cy - ay) * (bx - ax) > (by - ay) * (cx - ax)) != ((dy - ay) * (bx - ax) > (by - ay) * (dx - ax))):
             return True
-        if (l1[0][0] == l2[0][0] and l1[0][1] == l2[0][1]) or (l1[0][0] == l2[1][0] and l1[0][1] == l2[1][1]):
+        if (ax == cx and ay == cy) or (ax == dx and ay == dy):
             return True
-        if (l1[1][0] == l2[0][0] and l1[1][1] == l2[0][1]) or (l1[1][0] == l2[1][0] and l1[1][1] == l2[1][1]):
+        if (bx == cx and by == cy) or (bx == dx and by == dy):
             return True
 
     @staticmethod
     def between(a, b, c):
-        if (a[0] is None or a[1] is None or b[0] is None or b[1] is None or c[0] is None or c[1] is None):
+        (ax, ay), (bx, by), (cx, cy) = a, b, c
+        if ax is None or ay is None or bx is None or by is None or cx is None or cy is None:
             return None
-        crossproduct = (c[1] - a[1]) * (b[0] - a[0]) - (c[0] - a[0]) * (b[1] - a[1])
+        bax = bx - ax
+        bay = by - ay
+        cax = cx - ax
+        cay = cy - ay
+        crossproduct = cay * bax - cax * bay
         if abs(crossproduct) > 1e-12:
             return False
-        dotproduct = (c[0] - a[0]) * (b[0] - a[0]) + (c[1] - a[1]) * (b[1] - a[1])
+        dotproduct = cax * bax + cay * bay
         if dotproduct < 0:
             return False
-        squaredlengthba = (b[0] - a[0]) * (b[0] - a[0]) + (b[1] - a[1]) * (b[1] - a[1])
+        squaredlengthba = bax * bax + bay * bay
         if dotproduct > squaredlengthba:
             return False
         return True
 
+    @staticmethod
+    def first_intersecting_segments(line_1, line_2):
+        """
+        Return the indexes (i, j) of the first pair of segments of line_1
+        and line_2 for which segment_intersects holds, scanning in the same
+        order as a nested loop over line_1 then line_2, or None if no
+        segments intersect. All pairs are tested at once with numpy
+        broadcasting.
+        """
+        xs_1, ys_1 = line_1.vectorize()
+        xs_2, ys_2 = line_2.vectorize()
+        dx_1, dy_1 = line_1.edges()
+        n_1 = len(xs_1) - 1
+        n_2 = len(xs_2) - 1
+        if n_1 * n_2 <= _AABB_MIN_PAIRS:
+            hits = _segment_hits(xs_1, ys_1, dx_1, dy_1, xs_2, ys_2)
+            index = np.flatnonzero(hits)
+            if index.size == 0:
+                return None
+            return divmod(int(index[0]), n_2)
+
+        # For long curves only test the segments of chunks whose bounding
+        # boxes overlap, as segments that touch must share some area.
+        # Chunks of line_1 are taken in order, and within a chunk the first
+        # hit in row-major order is the first in nested loop order.
+        boxes_1 = _chunk_boxes(xs_1, ys_1)
+        boxes_2 = _chunk_boxes(xs_2, ys_2)
+        overlap = ((boxes_1[2][:, None] >= boxes_2[0][None, :])
+                   & (boxes_2[2][None, :] >= boxes_1[0][:, None])
+                   & (boxes_1[3][:, None] >= boxes_2[1][None, :])
+                   & (boxes_2[3][None, :] >= boxes_1[1][:, None]))
+        for chunk in np.flatnonzero(overlap.any(axis=1)):
+            start = chunk * _AABB_CHUNK
+            stop = min(start + _AABB_CHUNK, n_1)
+            columns = np.concatenate([np.arange(c * _AABB_CHUNK, min((c + 1) * _AABB_CHUNK, n_2))
+                                      for c in np.flatnonzero(overlap[chunk])])
+            hits = _segment_hits(xs_1[start:stop + 1], ys_1[start:stop + 1],
+                                 dx_1[start:stop], dy_1[start:stop],
+                                 xs_2, ys_2, columns)
+            index = np.flatnonzero(hits)
+            if index.size:
+                i, j = divmod(int(index[0]), len(columns))
+                return start + i, int(columns[j])
+        return None
+
+    @staticmethod
+    def point_on_segments(line, point):
+        """
+        Return True if between holds for point and any segment of line,
+        testing all segments at once.
+        """
+        if len(line.points) < 2:
+            return False
+        xs, ys = line.vectorize()
+        bax, bay = line.edges()
+        cax = point[0] - xs[:-1]
+        cay = point[1] - ys[:-1]
+        # Negated comparisons so NaN coordinates behave as in between().
+        crossproduct = cay * bax - cax * bay
+        on_line = ~(np.abs(crossproduct) > 1e-12)
+        dotproduct = cax * bax + cay * bay
+        on_line &= ~(dotproduct < 0)
+        on_line &= ~(dotproduct > bax * bax + bay * bay)
+        return bool(on_line.any())
+
     @staticmethod
     def intersection(pl_1, pl_2):
+        # The bounds add() maintains are used below when the lines don't
+        # intersect, so keep the PolyLines as well as their points.
+        line_1 = pl_1
+        line_2 = pl_2
         pl_1 = pl_1.points
         pl_2 = pl_2.points
 
+        n_1 = len(pl_1)
+        n_2 = len(pl_2)
+
         # we have two points
-        if len(pl_1) == 1 and len(pl_2) == 1:
+        if n_1 == 1 and n_2 == 1:
             if pl_1[0][0] == pl_2[0][0] and pl_1[0][1] == pl_2[0][1]:
                 quantity = pl_1[0][0]
                 price = pl_1[0][1]
                 return quantity, price
 
         # we have one point and line segments
-        elif len(pl_1) == 1 or len(pl_2) == 1:
-            if len(pl_1) == 1:
+        elif n_1 == 1 or n_2 == 1:
+            if n_1 == 1:
                 point = pl_1[0]
-                line = pl_2
+                line = line_2
             else:
                 point = pl_2[0]
-                line = pl_1
-            for j, pl_2_1 in enumerate(line[:-1]):
-                pl_2_2 = line[j + 1]
-                if PolyLine.between(pl_2_1, pl_2_2, point):
-                    quantity = point[0]
-                    price = point[1]
-                    return quantity, price
+                line = line_1
+            if PolyLine.point_on_segments(line, point):
+                quantity = point[0]
+                price = point[1]
+                return quantity, price
 
         # we have line segments
-        elif len(pl_1) > 1 and len(pl_2) > 1:
-            for i, pl_1_1 in enumerate(pl_1[:-1]):
-                pl_1_2 = pl_1[i + 1]
-                for j, pl_2_1 in enumerate(pl_2[:-1]):
-                    pl_2_2 = pl_2[j + 1]
-                    if PolyLine.segment_intersects((pl_1_1, pl_1_2), (pl_2_1, pl_2_2)):
-                        quantity, price = PolyLine.segment_intersection((pl_1_1, pl_1_2), (pl_2_1, pl_2_2))
-                        return quantity, price
-        p1_qmax = max([point[0] for point in pl_1])
-        p1_qmin = min([point[0] for point in pl_1])
-
-        p2_qmax = max([point[0] for point in pl_2])
-        p2_qmin = min([point[0] for point in pl_2])
-
-        p1_pmax = max([point[1] for point in pl_1])
-        p2_pmax = max([point[1] for point in pl_2])
-
-        p1_pmin = min([point[1] for point in pl_1])
-        p2_pmin = min([point[1] for point in pl_2])
+        elif n_1 > 1 and n_2 > 1:
+            hit = PolyLine.first_intersecting_segments(line_1, line_2)
+            if hit is not None:
+                i, j = hit
+                quantity, price = PolyLine.segment_intersection((pl_1[i], pl_1[i + 1]), (pl_2[j], pl_2[j + 1]))
+                return quantity, price
+        p1_qmax = line_1.max_x()
+        p1_qmin = line_1.min_x()
+
+        p2_qmax = line_2.max_x()
+        p2_qmin = line_2.min_x()
+
+        p1_pmax = line_1.max_y()
+        p2_pmax = line_2.max_y()
+
+        p1_pmin = line_1.min_y()
+        p2_pmin = line_2.min_y()
         # The lines don't intersect, add the auxillary information
         # TODO - clean this method up.
         if p1_pmax <= p2_pmax and p1_pmax <=p2_pmin:
@@ -286,50 +476,49 @@ class PolyLine:
 
     @staticmethod
     def line_intersection(line1, line2):
-        x1x3 = line1[0][0]-line2[0][0]
-        y3y4 = line2[0][1]-line2[1][1]
-        y1y3 = line1[0][1]-line2[0][1]
-        y1y2 = line1[0][1]-line1[1][1]
-        x3x4 = line2[0][0]-line2[1][0]
-        x1x2 = line1[0][0]-line1[1][0]
-        y1y3 = line1[0][1]-line2[0][1]
-        if x1x2*y3y4 - y1y2*x3x4 == 0:
+        (x1, y1), (x2, y2) = line1
+        (x3, y3), (x4, y4) = line2
+        x1x2 = x1 - x2
+        y1y2 = y1 - y2
+        x3x4 = x3 - x4
+        y3y4 = y3 - y4
+        div = x1x2 * y3y4 - y1y2 * x3x4
+        if div == 0:
             return None
-        t = (x1x3*y3y4 - y1y3*x3x4)/(x1x2*y3y4 - y1y2*x3x4)
-        #    u=(x1x2*y1y3-y1y2*x1x3)/(x1x2*y3y4-y1y2*x3x4)
-        x = line1[0][0] + t*(line1[1][0] - line1[0][0])
-        y = line1[0][1] + t*(line1[1][1] - line1[0][1])
-        #       if x>max(line1[0][0],line1[1][0]) or x>max(line2[0][0],line2[1][0]) or x<min(line1[0][0],line1[1][0]) or x<min(line2[0][0],line2[1][0]) or y>max(line1[0][1],line1[1][1]) or y>max(line2[0][1],line2[1][1]) or y<min(line1[0][1],line1[1][1]) or y<min(line2[0][1],line2[1][1]):
-        #                return x
-        if y > max(line1[0][1], line1[1][1]):
-                 return min(line1[0][0], line1[1][0]), y
-        if y > max(line2[0][1], line2[1][1]):
-                 return min(line2[0][0], line2[1][0]), y
-        if y < min(line1[0][1], line1[1][1]):
-                 return max(line1[0][0], line1[1][0]), y
-        if y < min(line2[0][1], line2[1][1]):
-            return max(line2[0][0], line2[1][0]), y
+        t = ((x1 - x3) * y3y4 - (y1 - y3) * x3x4) / div
+        x = x1 - t * x1x2
+        y = y1 - t * y1y2
+        # Clamp to the segments when the lines cross outside them.
+        if y > max(y1, y2):
+            return min(x1, x2), y
+        if y > max(y3, y4):
+            return min(x3, x4), y
+        if y < min(y1, y2):
+            return max(x1, x2), y
+        if y < min(y3, y4):
+            return max(x3, x4), y
         return x, y
 
     @staticmethod
     def poly_intersection(poly1, poly2):
+        if len(poly1.points) < 2 or len(poly2.points) < 2:
+            return False
+        # line_intersection extends the segments to full lines, so it has a
+        # result for every pair that is not parallel. Find the first such
+        # pair in loop order with one broadcast test instead of trying each
+        # pair in turn.
+        dx_1, dy_1 = poly1.edges()
+        dx_2, dy_2 = poly2.edges()
+        index = np.flatnonzero(dx_1[:, None] * dy_2[None, :] - dy_1[:, None] * dx_2[None, :] != 0)
         poly1 = poly1.points
         poly2 = poly2.points
-        for i, p1_first_point in enumerate(poly1[:-1]):
-            p1_second_point = poly1[i + 1]
-
-            for j, p2_first_point in enumerate(poly2[:-1]):
-                p2_second_point = poly2[j + 1]
-
-                if PolyLine.line_intersection((p1_first_point, p1_second_point), (p2_first_point, p2_second_point)):
-                    x, y = PolyLine.line_intersection((p1_first_point, p1_second_point), (p2_first_point, p2_second_point))
-                    return x, y
-
-        return False
+        if index.size == 0:
+            return False
+        i, j = divmod(int(index[0]), len(poly2) - 1)
+        return PolyLine.line_intersection((poly1[i], poly1[i + 1]), (poly2[j], poly2[j + 1]))
 
     @staticmethod
     def compare(demand_curve, supply_curve):
-        aux = {}
         demand_max_quantity = demand_curve.max_x()
         demand_min_quantity = demand_curve.min_x()
         supply_max_quantity = supply_curve.max_x()
@@ -339,13 +528,10 @@ class PolyLine:
         supply_max_price = supply_curve.max_y()
         supply_min_price = supply_curve.min_y()
 
-        aux['SQn,DQn'] = (supply_min_quantity > demand_min_quantity) - (supply_min_quantity < demand_min_quantity)
-        aux['SQn,DQx'] = (supply_min_quantity > demand_max_quantity) - (supply_min_quantity < demand_max_quantity)
-        aux['SQx,DQn'] = (supply_max_quantity > demand_min_quantity) - (supply_max_quantity < demand_min_quantity)
-        aux['SQx,DQx'] = (supply_max_quantity > demand_max_quantity) - (supply_max_quantity < demand_max_quantity)
-
-        aux['SPn,DPn'] = (supply_min_price > demand_min_price) - (supply_min_price < demand_min_price)
-        aux['SPn,DPx'] = (supply_min_price > demand_max_price) - (supply_min_price < demand_max_price)
-        aux['SPx,DPn'] = (supply_max_price > demand_min_price) - (supply_max_price < demand_min_price)
-        aux['SPx,DPx'] = (supply_max_price > demand_max_price) - (supply_max_price < demand_max_price)
-        return aux
+        # cmp() of each supply bound against each demand bound, in key order
+        supply = (supply_min_quantity, supply_min_quantity, supply_max_quantity, supply_max_quantity,
+                  supply_min_price, supply_min_price, supply_max_price, supply_max_price)
+        demand = (demand_min_quantity, demand_max_quantity, demand_min_quantity, demand_max_quantity,
+                  demand_min_price, demand_max_price, demand_min_price, demand_max_price)
+        signs = [(s > d) - (s < d) for s, d in zip(supply, demand)]
+        return dict(zip(_COMPARE_KEYS, signs))
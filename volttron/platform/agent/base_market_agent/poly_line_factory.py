@@ -40,6 +40,25 @@ def remove(duplicate):
     return final_list
 
 
+def sum_x(lines, ys):
+    """
+    Sum the x values of lines at each y in ys, evaluating each line over
+    the whole grid with one interpolation call. Returns a list with None
+    where no line has a value.
+    """
+    ys = np.asarray(ys, dtype=np.float64)
+    total = np.zeros(len(ys))
+    found = np.zeros(len(ys), dtype=bool)
+    for line in lines:
+        xs = line.x(ys)
+        if xs is None:
+            continue
+        valid = ~np.isnan(xs)
+        total[valid] += xs[valid]
+        found |= valid
+    return [x if f else None for x, f in zip(total.tolist(), found.tolist())]
+
+
 class PolyLineFactory:
     @staticmethod
     def combine(lines, increment):
@@ -78,13 +97,7 @@ class PolyLineFactory:
 
         # now find the cumulative x associated with each y in the array
         # starting with the highest y
-        for y in ys:
-            xt = None
-            for line in lines:
-                x = line.x(y)
-                # print x, y
-                if x is not None:
-                    xt = x if xt is None else xt + x
+        for y, xt in zip(ys, sum_x(lines, ys)):
             composite.add(Point(xt, y))
 
         return composite
@@ -103,17 +116,12 @@ class PolyLineFactory:
         # find the range defined by the curves
         ys=[]
         for l in lines:
-            ys=ys+l.vectorize()[1]
+            ys=ys+l.vectorize()[1].tolist()
 
         ys = remove(ys)
 
         ys.sort(reverse=True)
-        for y in ys:
-            xt = None
-            for line in lines:
-                x = line.x(y)
-                if x is not None:
-                    xt = x if xt is None else xt + x
+        for y, xt in zip(ys, sum_x(lines, ys)):
             composite.add(Point(xt, y))
         return composite
 
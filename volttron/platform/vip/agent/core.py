@@ -22,8 +22,8 @@
 # ===----------------------------------------------------------------------===
 # }}}
 
+import functools
 import heapq
-import inspect
 import logging
 import os
 import platform as python_platform
@@ -34,13 +34,14 @@ import typing
 import urllib.parse
 import uuid
 import warnings
-import weakref
+from collections import deque
 from contextlib import contextmanager
 from errno import ENOENT
 
 import gevent.event
-import grequests
-from gevent.queue import Queue
+import requests
+from gevent.queue import SimpleQueue
+from requests.adapters import HTTPAdapter
 from zmq import green as zmq
 from zmq.green import EAGAIN, ENOTSOCK, ZMQError
 from zmq.utils.monitor import recv_monitor_message
@@ -59,11 +60,10 @@ from volttron.utils.rmq_mgmt import RabbitMQMgmt
 from .... import platform
 from .. import router
 from ..rmq_connection import RMQConnection
-from ..socket import Message
 from ..zmq_connection import ZMQConnection
 from .decorators import annotate, annotations, dualmethod
 from .dispatch import Signal
-from .errors import VIPError
+from .errors import Unreachable, VIPError
 
 if is_rabbitmq_available():
     import pika
@@ -72,7 +72,6 @@ __all__ = ['BasicCore', 'Core', 'RMQCore', 'ZMQCore', 'killing']
 
 _log = logging.getLogger(__name__)
 
-
 class Periodic:  # pylint: disable=invalid-name
     ''' Decorator to set a method up as a periodic callback.
 
@@ -97,24 +96,28 @@ class Periodic:  # pylint: disable=invalid-name
         # pylint: disable=missing-docstring
         # Use monotonic clock provided on hu's loop instance.
         now = gevent.get_hub().loop.now
+        sleep = gevent.sleep
+        args = self.args
+        kwargs = self.kwargs
         period = self.period
         deadline = now()
         if self.timeout != 0:
             timeout = self.timeout or period
             deadline += timeout
-            gevent.sleep(timeout)
+            sleep(timeout)
         while True:
             try:
-                method(*self.args, **self.kwargs)
+                method(*args, **kwargs)
             except (Exception, gevent.Timeout):
                 _log.exception('unhandled exception in periodic callback')
             deadline += period
-            timeout = deadline - now()
+            current = now()
+            timeout = deadline - current
             if timeout > 0:
-                gevent.sleep(timeout)
+                sleep(timeout)
             else:
                 # Prevent catching up.
-                deadline -= timeout
+                deadline = current
 
     def get(self, method):
         '''Return a Greenlet for the given method.'''
@@ -124,16 +127,23 @@ class Periodic:  # pylint: disable=invalid-name
 class ScheduledEvent:
     '''Class returned from Core.schedule.'''
 
+    __slots__ = ('function', 'args', 'kwargs', 'canceled', 'finished',
+                 'on_cancel')
+
     def __init__(self, function, args=None, kwargs=None):
         self.function = function
         self.args = args or []
         self.kwargs = kwargs or {}
         self.canceled = False
         self.finished = False
+        self.on_cancel = None
 
     def cancel(self):
         '''Mark the timer as canceled to avoid a callback.'''
+        pending = not (self.canceled or self.finished)
         self.canceled = True
+        if pending and self.on_cancel is not None:
+            self.on_cancel()
 
     def __call__(self):
         if not self.canceled:
@@ -153,18 +163,117 @@ def findsignal(obj, owner, name):
     return signal
 
 
+_csr_session = None
+
+
+def _get_csr_session():
+    '''Return the HTTP session shared by CSR requests.
+
+    Polling a CSR from PENDING to APPROVED reuses the pooled connection
+    instead of a new TCP and TLS handshake per request.
+    '''
+    global _csr_session
+    if _csr_session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        _csr_session = session
+    return _csr_session
+
+
+# CURVE key pairs loaded for RMQ cores, keyed by everything
+# ZMQClientAuthentication uses to locate the keys.
+_keypair_cache = {}
+
+
+# Parsed known hosts file as (path, (st_mtime_ns, st_size), contents).
+_known_hosts = (None, None, {})
+
+
+def _cached_serverkey(address):
+    '''Return the known hosts serverkey for address, or None.
+
+    The known hosts file is only read again when its path, modification time
+    or size changes.
+    '''
+    global _known_hosts
+    filename = os.path.join(get_home(), 'known_hosts')
+    try:
+        st = os.stat(filename)
+    except FileNotFoundError:
+        # KnownHostsStore creates the file.
+        return KnownHostsStore(filename).serverkey(address)
+    version = (st.st_mtime_ns, st.st_size)
+    if _known_hosts[0] != filename or _known_hosts[1] != version:
+        _known_hosts = (filename, version, KnownHostsStore(filename).load())
+    return _known_hosts[2].get(KnownHostsStore._parse_addr(address))
+
+
+# Errors from a remote connect attempt that a later retry may get past.
+# Anything else, such as a ValueError from bad arguments, is raised without
+# backing off.
+_REMOTE_CONNECT_ERRORS = (gevent.Timeout, OSError, ZMQError, Unreachable)
+
+
+class _RemotePending(Exception):
+    '''Raised by a remote connect that is waiting on the remote side, such
+    as a CSR awaiting administrator approval. It is not a failure, so it
+    does not back off.'''
+
+
+def _remote_backoff(method):
+    '''Back off exponentially from remote addresses that failed to connect.
+
+    Wraps connect_remote_platform. While an address is backing off the call
+    returns None without trying it; a failed connection (None result,
+    connection error or timeout) grows the delay up to the core's
+    max_remote_retry_interval and a successful connection resets it. A
+    connect that raises _RemotePending returns None without backing off,
+    so it is polled at the caller's own rate. The state is kept per core
+    in _remote_retry.
+    '''
+    @functools.wraps(method)
+    def wrapper(self, address, *args, **kwargs):
+        failed = self._remote_retry.get(address)
+        if failed is not None and time.monotonic() < failed[1]:
+            _log.debug("Not connecting to %s until its retry backoff expires",
+                       address)
+            return None
+        try:
+            value = method(self, address, *args, **kwargs)
+        except _RemotePending:
+            self._remote_retry.pop(address, None)
+            return None
+        except _REMOTE_CONNECT_ERRORS:
+            self._remote_failed(address)
+            raise
+        if value is None:
+            self._remote_failed(address)
+        else:
+            self._remote_retry.pop(address, None)
+        return value
+
+    return wrapper
+
+
 class BasicCore:
     delay_onstart_signal = False
     delay_running_event_set = False
+    _sigint_checked = False
 
     def __init__(self, owner):
         self.greenlet = None
-        self.spawned_greenlets = weakref.WeakSet()
+        # Greenlets to kill when the core stops. Each one removes itself
+        # when it finishes (see _track), so no weak references are needed.
+        self.spawned_greenlets = set()
         self._async = None
-        self._async_calls = []
+        self._async_calls = deque()
+        self._async_pending = False
         self._stop_event = None
         self._schedule_event = None
         self._schedule = []
+        self._schedule_canceled = 0
         self.onsetup = Signal()
         self.onstart = Signal()
         self.onstop = Signal()
@@ -174,8 +283,13 @@ class BasicCore:
 
         # SIGINT does not work in Windows.
         # If using the standalone agent on a windows machine,
-        # this section will be skipped
-        if python_platform.system() != 'Windows':
+        # this section will be skipped. The handler can only be installed
+        # from the main thread and is checked once per process; later cores
+        # would find the first core's handler and leave it in place anyway.
+        if (not BasicCore._sigint_checked
+                and python_platform.system() != 'Windows'
+                and threading.current_thread() is threading.main_thread()):
+            BasicCore._sigint_checked = True
             prev_int_signal = gevent.signal.getsignal(signal.SIGINT)
             # To avoid a child agent handler overwriting the parent agent handler
             if prev_int_signal in [None, signal.SIG_IGN, signal.SIG_DFL]:
@@ -203,11 +317,28 @@ class BasicCore:
             for name in annotations(member, set, 'core.signals'):
                 findsignal(self, owner, name).connect(member, owner)
 
-        inspect.getmembers(owner, setup)
+        # Only attributes carrying annotations need setting up, so check the
+        # raw instance and class namespaces instead of fetching every member
+        # of the owner. Members are set up in name order, as before.
+        seen = set()
+        annotated = []
+        namespaces = [vars(klass) for klass in type(owner).__mro__]
+        if hasattr(owner, '__dict__'):
+            namespaces.insert(0, owner.__dict__)
+        for namespace in namespaces:
+            for name, value in namespace.items():
+                if name in seen:
+                    continue
+                seen.add(name)
+                if (hasattr(value, '_annotations')
+                        or hasattr(getattr(value, '__func__', None), '_annotations')):
+                    annotated.append(name)
+        for name in sorted(annotated):
+            setup(getattr(owner, name))
 
         def start_periodics(sender, **kwargs):  # pylint: disable=unused-argument
             for periodic in periodics:
-                sender.spawned_greenlets.add(periodic)
+                sender._track(periodic)
                 periodic.start()
             del periodics[:]
 
@@ -223,9 +354,15 @@ class BasicCore:
         # pre-finish
         yield
 
+    def _track(self, greenlet):
+        '''Add greenlet to spawned_greenlets until it finishes.'''
+        self.spawned_greenlets.add(greenlet)
+        greenlet.rawlink(self.spawned_greenlets.discard)
+        return greenlet
+
     def link_receiver(self, receiver, sender, **kwargs):
         greenlet = gevent.spawn(receiver, sender, **kwargs)
-        self.spawned_greenlets.add(greenlet)
+        self._track(greenlet)
         return greenlet
 
     def run(self, running_event=None):  # pylint: disable=method-hidden
@@ -236,40 +373,100 @@ class BasicCore:
         self.greenlet = current = gevent.getcurrent()
 
         def kill_leftover_greenlets():
-            for glt in self.spawned_greenlets:
+            for glt in list(self.spawned_greenlets):
                 glt.kill()
 
         self.greenlet.link(lambda _: kill_leftover_greenlets())
 
         def handle_async_():
             '''Execute pending calls.'''
+            # send() may append from other threads, so drain the same deque
+            # in place (deque appends and pops are atomic) rather than
+            # swapping in a new one, which could strand a late append.
+            # Cleared before draining so a call queued during the drain
+            # arms the watcher again.
+            self._async_pending = False
             calls = self._async_calls
+            # Calls run in the order they were sent.
+            popleft = calls.popleft
+            spawn = gevent.spawn
+            track = self._track
             while calls:
-                func, args, kwargs = calls.pop()
-                greenlet = gevent.spawn(func, *args, **kwargs)
-                self.spawned_greenlets.add(greenlet)
+                func, args, kwargs = popleft()
+                track(spawn(func, *args, **kwargs))
 
         def schedule_loop():
             heap = self._schedule
             event = self._schedule_event
-            cur = gevent.getcurrent()
-            now = time.time()
+            # Callbacks still running when the scheduler is killed are
+            # killed with it. A single link covers all of them instead of
+            # one closure per callback accumulating on the scheduler.
+            scheduled = set()
+
+            def track(greenlet):
+                scheduled.add(greenlet)
+                greenlet.rawlink(scheduled.discard)
+
+            def kill_scheduled(glt):
+                for greenlet in list(scheduled):
+                    greenlet.kill()
+
+            gevent.getcurrent().link(kill_scheduled)
+            heappop = heapq.heappop
+            heapreplace = heapq.heapreplace
+            tie_breaker = self.get_tie_breaker
+            spawn = gevent.spawn
+            wait = event.wait
+            clear = event.clear
+            clock = time.time
+            now = clock()
             while True:
                 if heap:
-                    deadline = heap[0][0]
-                    timeout = min(5.0, max(0.0, deadline - now))
+                    # Entries are (deadline, tie_breaker, callback) and the
+                    # tie breaker is unique, so heapq never compares the
+                    # callbacks themselves.
+                    timeout = heap[0][0] - now
+                    if timeout < 0.0:
+                        timeout = 0.0
+                    elif timeout > 5.0:
+                        timeout = 5.0
                 else:
                     timeout = None
-                if event.wait(timeout):
-                    event.clear()
-                now = time.time()
+                if wait(timeout):
+                    clear()
+                now = clock()
                 while heap and now >= heap[0][0]:
-                    _, _, callback = heapq.heappop(heap)
-                    greenlet = gevent.spawn(callback)
-                    cur.link(lambda glt: greenlet.kill())
+                    callback = heap[0][2]
+                    callback_event = getattr(callback, 'event', callback)
+                    if callback_event.canceled:
+                        heappop(heap)
+                        callback_event.finished = True
+                        if self._schedule_canceled:
+                            self._schedule_canceled -= 1
+                        continue
+                    advance = getattr(callback, 'advance', None)
+                    deadline = advance() if advance is not None else None
+                    if deadline is None:
+                        heappop(heap)
+                        # The entry has left the heap, so a later cancel
+                        # must not count towards the purge threshold.
+                        callback_event.on_cancel = None
+                    else:
+                        # Recurring entries take the place of the fired
+                        # one in a single sift.
+                        heapreplace(heap,
+                                    (deadline, tie_breaker(), callback))
+                    track(spawn(callback))
+                    if deadline is not None and deadline <= now:
+                        # An entry that is still overdue after firing would
+                        # be fired again for every missed tick in this pass.
+                        # Go back to the wait, which yields to the hub, so
+                        # it fires at most once per pass.
+                        break
 
         self._stop_event = stop = gevent.event.Event()
         self._async = gevent.get_hub().loop.async_()
+        self._async_pending = False
         self._async.start(handle_async_)
         current.link(lambda glt: self._async.stop())
 
@@ -279,7 +476,7 @@ class BasicCore:
 
         loop = next(looper)
         if loop:
-            self.spawned_greenlets.add(loop)
+            self._track(loop)
         scheduler = gevent.Greenlet(schedule_loop)
         if loop:
             loop.link(lambda glt: scheduler.kill())
@@ -329,7 +526,11 @@ class BasicCore:
 
     def send(self, func, *args, **kwargs):
         self._async_calls.append((func, args, kwargs))
-        self._async.send()
+        # Only wake the loop if a wakeup is not already pending; the queued
+        # call is picked up by the drain that pending wakeup triggers.
+        if not self._async_pending:
+            self._async_pending = True
+            self._async.send()
 
     def send_async(self, func, *args, **kwargs):
         result = gevent.event.AsyncResult()
@@ -359,13 +560,13 @@ class BasicCore:
     def spawn(self, func, *args, **kwargs):
         assert self.greenlet is not None
         greenlet = gevent.spawn(func, *args, **kwargs)
-        self.spawned_greenlets.add(greenlet)
+        self._track(greenlet)
         return greenlet
 
     def spawn_later(self, seconds, func, *args, **kwargs):
         assert self.greenlet is not None
         greenlet = gevent.spawn_later(seconds, func, *args, **kwargs)
-        self.spawned_greenlets.add(greenlet)
+        self._track(greenlet)
         return greenlet
 
     def spawn_in_thread(self, func, *args, **kwargs):
@@ -389,7 +590,7 @@ class BasicCore:
             'schedule() method with the periodic() generator. This '
             'method will be removed in a future version.', DeprecationWarning)
         greenlet = Periodic(period, args, kwargs, wait).get(func)
-        self.spawned_greenlets.add(greenlet)
+        self._track(greenlet)
         greenlet.start()
         return greenlet
 
@@ -414,6 +615,7 @@ class BasicCore:
     @dualmethod
     def schedule(self, deadline, func, *args, **kwargs):
         event = ScheduledEvent(func, args, kwargs)
+        event.on_cancel = self._schedule_cancel
         try:
             it = iter(deadline)
         except TypeError:
@@ -426,28 +628,67 @@ class BasicCore:
         self.tie_breaker += 1
         return self.tie_breaker
 
+    def _schedule_cancel(self):
+        # Canceled entries are dropped when they reach the head of the
+        # heap. Once they make up most of a large heap, purge them all.
+        self._schedule_canceled += 1
+        heap = self._schedule
+        if (self._schedule_canceled > 50
+                and self._schedule_canceled * 2 > len(heap)):
+            # Rebuilt in place; schedule_loop holds a reference to the list.
+            keep = []
+            for entry in heap:
+                event = getattr(entry[2], 'event', entry[2])
+                if event.canceled:
+                    event.finished = True
+                else:
+                    keep.append(entry)
+            heap[:] = keep
+            heapq.heapify(heap)
+            self._schedule_canceled = 0
+
     def _schedule_callback(self, deadline, callback):
         deadline = utils.get_utc_seconds_from_epoch(deadline)
-        heapq.heappush(self._schedule,
-                       (deadline, self.get_tie_breaker(), callback))
-        if self._schedule_event:
+        entry = (deadline, self.get_tie_breaker(), callback)
+        heapq.heappush(self._schedule, entry)
+        # The scheduler already sleeps until the earliest deadline, so it
+        # only needs waking when this entry became the new earliest one.
+        if self._schedule_event and self._schedule[0] is entry:
             self._schedule_event.set()
 
     def _schedule_iter(self, it, event):
+        last = False
+        error = None
+
+        def advance():
+            # Called by the scheduler as the current entry fires. Returns
+            # the next deadline so the entry is replaced in place, or None
+            # when there is no next run.
+            nonlocal last, error
+            if event.canceled:
+                return None
+            try:
+                deadline = next(it)
+            except StopIteration:
+                last = True
+                return None
+            except Exception as exc:
+                error = exc
+                return None
+            return utils.get_utc_seconds_from_epoch(deadline)
 
         def wrapper():
+            if error is not None:
+                raise error
             if event.canceled:
                 event.finished = True
                 return
-            try:
-                deadline = next(it)
-            except StopIteration:
-                event.function(*event.args, **event.kwargs)
+            event.function(*event.args, **event.kwargs)
+            if last:
                 event.finished = True
-            else:
-                self._schedule_callback(deadline, wrapper)
-                event.function(*event.args, **event.kwargs)
 
+        wrapper.advance = advance
+        wrapper.event = event
         try:
             deadline = next(it)
         except StopIteration:
@@ -476,6 +717,18 @@ class Core(BasicCore):
     # Agents started before the router can set this variable
     # to false to keep from blocking. AuthService does this.
     delay_running_event_set = True
+    # Seconds to wait before retrying a remote platform that failed to
+    # connect, multiplied by remote_retry_factor per consecutive failure.
+    remote_retry_interval = 2.0
+    remote_retry_factor = 2
+    max_remote_retry_interval = 300.0
+    # connect_remote_platform dispatches on the address scheme to the
+    # named method.
+    _remote_schemes = {
+        'tcp': '_connect_tcp',
+        'http': '_connect_http',
+        'https': '_connect_http',
+    }
 
     def __init__(self,
                  owner,
@@ -512,6 +765,12 @@ class Core(BasicCore):
         self.instance_name = instance_name
         self.messagebus = messagebus
         self.subsystems = {'error': self.handle_error}
+        # instance_name.identity, looked up on the first remote connect.
+        self._fq_identity = None
+        # Remote addresses whose last connect attempt failed, mapped to
+        # (consecutive failures, time.monotonic() before which no attempt
+        # is made).
+        self._remote_retry = {}
         self.__connected = False
         self._version = version
         self.socket = None
@@ -525,6 +784,57 @@ class Core(BasicCore):
     def version(self):
         return self._version
 
+    def _get_fq_identity(self):
+        if self._fq_identity is None:
+            self._fq_identity = get_fq_identity(self.identity)
+        return self._fq_identity
+
+    def _remote_failed(self, address):
+        attempts = self._remote_retry.get(address, (0, 0.0))[0]
+        delay = min(self.remote_retry_interval
+                    * self.remote_retry_factor ** attempts,
+                    self.max_remote_retry_interval)
+        # The count only needs to grow until the delay reaches its cap.
+        if delay < self.max_remote_retry_interval:
+            attempts += 1
+        self._remote_retry[address] = (attempts, time.monotonic() + delay)
+
+    def _connect_tcp(self, address, serverkey, agent_class):
+        from volttron.platform.vip.agent.utils import build_agent
+
+        # ZMQ connection, shared by both message buses.
+        destination_serverkey = None
+        _log.debug("parsed address scheme is tcp. auth enabled = %s",
+                   self.enable_auth)
+        if self.enable_auth:
+            temp_serverkey = _cached_serverkey(address)
+            if not temp_serverkey:
+                _log.info(
+                    "Destination serverkey not found in known hosts file, "
+                    "using config")
+                destination_serverkey = serverkey
+            elif not serverkey:
+                destination_serverkey = temp_serverkey
+            else:
+                if temp_serverkey != serverkey:
+                    raise ValueError(
+                        "server_key passed and known hosts serverkey do not "
+                        ""
+                        "match!")
+                destination_serverkey = serverkey
+
+        _log.debug("Connecting using: %s", self._get_fq_identity())
+
+        return build_agent(
+            agent_class=agent_class,
+            identity=self._get_fq_identity(),
+            serverkey=destination_serverkey,
+            publickey=self.publickey,
+            secretkey=self.secretkey,
+            message_bus="zmq",
+            address=address,
+        )
+
     def get_connected(self):
         return self.__connected
 
@@ -611,11 +921,8 @@ class Core(BasicCore):
             state.ident = ident = 'connect.hello.%d' % state.count
             state.count += 1
             self.spawn(connection_failed_check)
-            message = Message(peer='',
-                              subsystem='hello',
-                              id=ident,
-                              args=['hello'])
-            self.connection.send_vip_object(message)
+            self.connection.send_vip('', 'hello', args=['hello'],
+                                     msg_id=ident)
 
         def hello_response(sender, version='', router='', identity=''):
             _log.info("Connected to platform: "
@@ -709,6 +1016,7 @@ class ZMQCore(Core):
         flags = dict(hwm=6000, reconnect_interval=self.reconnect_interval)
         self.connection.set_properties(flags)
         self.socket = self.connection.socket
+        scheme = self.address.split(':', 1)[0]
         yield
 
         # pre-start
@@ -718,8 +1026,13 @@ class ZMQCore(Core):
         connection_failed_check, hello, hello_response = \
             self.create_event_handlers(state, hello_response_event, running_event)
 
+        # Set by the monitor while the socket is known to be disconnected so
+        # close_socket only waits out the grace period when it is not.
+        disconnected = gevent.event.Event()
+
         def close_socket(sender):
-            gevent.sleep(2)
+            if self.socket is not None:
+                disconnected.wait(2.0)
             try:
                 if self.socket is not None:
                     self.socket.monitor(None, 0)
@@ -746,8 +1059,10 @@ class ZMQCore(Core):
                             self.onsockevent.send(self, **message)
                             event = message['event']
                             if event & zmq.EVENT_CONNECTED:
+                                disconnected.clear()
                                 hello()
                             elif event & zmq.EVENT_DISCONNECTED:
+                                disconnected.set()
                                 self.connected = False
                             elif event & zmq.EVENT_CONNECT_RETRIED:
                                 self._reconnect_attempt += 1
@@ -757,6 +1072,7 @@ class ZMQCore(Core):
                                     self.stop()
                                     self.ondisconnected.send(self)
                             elif event & zmq.EVENT_MONITOR_STOPPED:
+                                disconnected.set()
                                 break
                         except ZMQError as exc:
                             if exc.errno == ENOTSOCK:
@@ -768,8 +1084,7 @@ class ZMQCore(Core):
                     #     pass
                 finally:
                     try:
-                        url = list(urllib.parse.urlsplit(self.address))
-                        if url[0] in ['tcp'] and sock is not None:
+                        if scheme == 'tcp' and sock is not None:
                             sock.close()
                         if self.socket is not None:
                             self.socket.monitor(None, 0)
@@ -780,14 +1095,17 @@ class ZMQCore(Core):
         self.onconnected.connect(hello_response)
         self.ondisconnected.connect(close_socket)
 
-        if self.address[:4] in ['tcp:', 'ipc:']:
+        if scheme in ('tcp', 'ipc'):
             self.spawn(monitor).join(0)
         self.connection.connect()
-        if self.address.startswith('inproc:'):
+        if scheme == 'inproc':
             hello()
 
         def vip_loop():
             sock = self.socket
+            # register() adds handlers to this same dict, so the local
+            # reference stays current.
+            subsystems = self.subsystems
             while True:
                 try:
                     # Message at this point in time will be a
@@ -809,7 +1127,7 @@ class ZMQCore(Core):
                 #     subsystem, message.id, len(message.args), message.args[0]))
 
                 # Handle hellos sent by CONNECTED event
-                if (str(subsystem) == 'hello' and message.id == state.ident
+                if (subsystem == 'hello' and message.id == state.ident
                         and len(message.args) > 3
                         and message.args[0] == 'welcome'):
                     version, server, identity = message.args[1:4]
@@ -821,13 +1139,13 @@ class ZMQCore(Core):
                     continue
 
                 try:
-                    handle = self.subsystems[subsystem]
+                    handle = subsystems[subsystem]
                 except KeyError:
                     _log.error('peer %r requested unknown subsystem %r',
                                message.peer, subsystem)
                     message.user = ''
-                    message.args = list(router._INVALID_SUBSYSTEM)
-                    message.args.append(message.subsystem)
+                    message.args = [*router._INVALID_SUBSYSTEM,
+                                    message.subsystem]
                     message.subsystem = 'error'
                     sock.send_vip_object(message, copy=False)
                 else:
@@ -850,6 +1168,7 @@ class ZMQCore(Core):
             self.socket = None
         yield
 
+    @_remote_backoff
     def connect_remote_platform(self,
                                 address: str,
                                 serverkey: typing.Optional[str] = None,
@@ -879,102 +1198,71 @@ class ZMQCore(Core):
         function.
 
         """
-        from volttron.platform.vip.agent import Agent
-        from volttron.platform.vip.agent.utils import build_agent
         if agent_class is None:
+            from volttron.platform.vip.agent import Agent
             agent_class = Agent
 
-        parsed_address = urllib.parse.urlparse(address)
-        _log.debug("Begining core.connect_remote_platform: {}".format(address))
+        _log.debug("Begining core.connect_remote_platform: %s", address)
+        scheme = urllib.parse.urlparse(address).scheme
+        connect = self._remote_schemes.get(scheme)
+        if connect is None:
+            raise ValueError(
+                "Invalid configuration found the address: {} has an invalid "
+                "scheme".format(address))
+        return getattr(self, connect)(address, serverkey, agent_class)
 
-        value = None
-        if parsed_address.scheme == "tcp":
-            # ZMQ connection
-            destination_serverkey = None
-            if self.enable_auth:
-                hosts = KnownHostsStore()
-                temp_serverkey = hosts.serverkey(address)
-                if not temp_serverkey:
-                    _log.info(
-                        "Destination serverkey not found in known hosts file, "
-                        "using config")
-                    destination_serverkey = serverkey
-                elif not serverkey:
-                    destination_serverkey = temp_serverkey
-                else:
-                    if temp_serverkey != serverkey:
-                        raise ValueError(
-                            "server_key passed and known hosts serverkey do not "
-                            ""
-                            "match!")
-                    destination_serverkey = serverkey
+    def _connect_http(self, address, serverkey, agent_class):
+        from volttron.platform.vip.agent.utils import build_agent
+        from volttron.platform.web import (DiscoveryError,
+                                           cached_discovery_info)
 
-            _log.debug("Connecting using: %s", get_fq_identity(self.identity))
+        value = None
+        try:
+            # TODO: Use known host instead of looking up for discovery
+            #  info if possible.
+
+            # We need to discover which type of bus is at the other end.
+            info = cached_discovery_info(address)
+            remote_identity = "{}.{}".format(
+                info.instance_name,
+                self._get_fq_identity(),
+            )
+            # if the current message bus is zmq then we need
+            # to connect a zmq on the remote, whether that be the
+            # rmq router or proxy.  Also note that we are using the
+            # fully qualified
+            # version of the identity because there will be conflicts if
+            # volttron central has more than one platform.agent connecting
+            if not info.vip_address:
+                err = ("Discovery from {} did not return vip_address".
+                       format(address))
+                raise ValueError(err)
+            if self.enable_auth and not info.serverkey:
+                err = ("Discovery from {} did not return serverkey".format(
+                    address))
+                raise ValueError(err)
+            _log.debug(
+                "Connecting using: %s",
+                self._get_fq_identity(),
+            )
 
+            # use fully qualified identity
             value = build_agent(
-                agent_class=agent_class,
-                identity=get_fq_identity(self.identity),
-                serverkey=destination_serverkey,
-                publickey=self.publickey,
+                identity=self._get_fq_identity(),
+                address=info.vip_address,
+                serverkey=info.serverkey,
                 secretkey=self.secretkey,
-                message_bus="zmq",
-                address=address,
+                publickey=self.publickey,
+                agent_class=agent_class,
             )
-        elif parsed_address.scheme in ("https", "http"):
-            from volttron.platform.web import DiscoveryError, DiscoveryInfo
-
-            try:
-                # TODO: Use known host instead of looking up for discovery
-                #  info if possible.
-
-                # We need to discover which type of bus is at the other end.
-                info = DiscoveryInfo.request_discovery_info(address)
-                remote_identity = "{}.{}.{}".format(
-                    info.instance_name,
-                    get_platform_instance_name(),
-                    self.identity,
-                )
-                # if the current message bus is zmq then we need
-                # to connect a zmq on the remote, whether that be the
-                # rmq router or proxy.  Also note that we are using the
-                # fully qualified
-                # version of the identity because there will be conflicts if
-                # volttron central has more than one platform.agent connecting
-                if not info.vip_address:
-                    err = ("Discovery from {} did not return vip_address".
-                           format(address))
-                    raise ValueError(err)
-                if self.enable_auth and not info.serverkey:
-                    err = ("Discovery from {} did not return serverkey".format(
-                        address))
-                    raise ValueError(err)
-                _log.debug(
-                    "Connecting using: %s",
-                    get_fq_identity(self.identity),
-                )
-
-                # use fully qualified identity
-                value = build_agent(
-                    identity=get_fq_identity(self.identity),
-                    address=info.vip_address,
-                    serverkey=info.serverkey,
-                    secretkey=self.secretkey,
-                    publickey=self.publickey,
-                    agent_class=agent_class,
-                )
-
-            except DiscoveryError:
-                _log.error(
-                    "Couldn't connect to %s or incorrect response returned "
-                    "response was %s",
-                    address,
-                    value,
-                )
 
-        else:
-            raise ValueError(
-                "Invalid configuration found the address: {} has an invalid "
-                "scheme".format(address))
+        except DiscoveryError:
+            _log.error(
+                "Couldn't connect to %s or incorrect response returned "
+                "response was %s",
+                address,
+                value,
+            )
 
         return value
 
@@ -1045,8 +1333,10 @@ class RMQCore(Core):
         assert self.instance_name, "Instance name must have been set in the platform config file."
         assert not volttron_central_instance_name, "Please report this as volttron_central_instance_name shouldn't be passed."
 
-        # self._event_queue = gevent.queue.Queue
-        self._event_queue = Queue()
+        # Unbounded: vip_message_handler runs on the connection's callback
+        # and must never block waiting for vip_loop, which may itself be
+        # waiting on a reply that arrives through the same callback.
+        self._event_queue = SimpleQueue()
 
         self.rmq_user = '.'.join([self.instance_name, self.identity])
 
@@ -1059,19 +1349,27 @@ class RMQCore(Core):
         # added so that it is available to auth subsytem when connecting
         # to remote instance
         if self.publickey is None or self.secretkey is None and self.enable_auth:
-            from volttron.platform.auth.auth_protocols.auth_zmq import ZMQClientAuthentication, ZMQClientParameters
-            zmq_auth = ZMQClientAuthentication(
-                ZMQClientParameters(address=self.address,
-                                    identity=self.identity,
-                                    agent_uuid=self.agent_uuid,
-                                    publickey=self.publickey,
-                                    secretkey=self.secretkey,
-                                    serverkey=self.serverkey,
-                                    volttron_home=self.volttron_home))
-
-            zmq_auth._set_public_and_secret_keys()
-            self.publickey = zmq_auth.publickey
-            self.secretkey = zmq_auth.secretkey
+            # Installed agents keep their keystore under the current
+            # directory, so it is part of the key.
+            cache_key = (self.address, self.identity, self.agent_uuid,
+                         self.volttron_home,
+                         os.path.abspath(os.curdir) if self.agent_uuid else None)
+            keys = _keypair_cache.get(cache_key)
+            if keys is None:
+                from volttron.platform.auth.auth_protocols.auth_zmq import ZMQClientAuthentication, ZMQClientParameters
+                zmq_auth = ZMQClientAuthentication(
+                    ZMQClientParameters(address=self.address,
+                                        identity=self.identity,
+                                        agent_uuid=self.agent_uuid,
+                                        publickey=self.publickey,
+                                        secretkey=self.secretkey,
+                                        serverkey=self.serverkey,
+                                        volttron_home=self.volttron_home))
+
+                zmq_auth._set_public_and_secret_keys()
+                keys = _keypair_cache[cache_key] = (zmq_auth.publickey,
+                                                    zmq_auth.secretkey)
+            self.publickey, self.secretkey = keys
 
     def _get_keys_from_addr(self):
         return None, None, None
@@ -1139,76 +1437,50 @@ class RMQCore(Core):
             self.stop()
             self.ondisconnected.send(self)
 
-        def connect_callback():
-            router_connected = False
-            try:
-                bindings = self.rmq_mgmt.get_bindings('volttron')
-            except AttributeError:
-                bindings = None
-            router_user = router_key = "{inst}.{ident}".format(
-                inst=self.instance_name, ident='router')
-            if bindings:
-                for binding in bindings:
-                    if binding['destination'] == router_user and \
-                            binding['routing_key'] == router_key:
-                        router_connected = True
-                        break
-            router_connected = True
-            # Connection retry attempt issue #1702.
-            # If the agent detects that RabbitMQ broker is reconnected before the router, wait
-            # for the router to connect before sending hello()
-            if router_connected:
-                hello()
-            else:
-                _log.debug(
-                    "Router not bound to RabbitMQ yet, waiting for 2 seconds before sending hello {}"
-                    .format(self.identity))
-                self.spawn_later(2, hello)
-
         # Connect to RMQ broker. Register a callback to get notified when
         # connection is confirmed
         if self.rmq_address:
-            self.connection.connect(connect_callback, connection_error)
+            self.connection.connect(hello, connection_error)
 
         self.onconnected.connect(hello_response)
         self.ondisconnected.connect(self.connection.close_connection)
 
         def vip_loop():
             if self.rmq_address:
-                wait_period = 1  # 1 second
+                get = self._event_queue.get
+                # register() adds handlers to this same dict, so the local
+                # reference stays current.
+                subsystems = self.subsystems
                 while True:
                     message = None
                     try:
-                        message = self._event_queue.get(wait_period)
-                    except gevent.Timeout:
-                        pass
+                        message = get()
                     except Exception as exc:
                         _log.error(exc.args)
                         raise
                     if message:
                         subsystem = message.subsystem
 
-                        if subsystem == 'hello':
-                            if (subsystem == 'hello'
-                                    and message.id == state.ident
-                                    and len(message.args) > 3
-                                    and message.args[0] == 'welcome'):
-                                version, server, identity = message.args[1:4]
-                                self.connected = True
-                                self.onconnected.send(self,
-                                                      version=version,
-                                                      router=server,
-                                                      identity=identity)
-                                continue
+                        if (subsystem == 'hello'
+                                and message.id == state.ident
+                                and len(message.args) > 3
+                                and message.args[0] == 'welcome'):
+                            version, server, identity = message.args[1:4]
+                            self.connected = True
+                            self.onconnected.send(self,
+                                                  version=version,
+                                                  router=server,
+                                                  identity=identity)
+                            continue
                         try:
-                            handle = self.subsystems[subsystem]
+                            handle = subsystems[subsystem]
                         except KeyError:
                             _log.error(
                                 'peer %r requested unknown subsystem %r',
                                 message.peer, subsystem)
                             message.user = ''
-                            message.args = list(router._INVALID_SUBSYSTEM)
-                            message.args.append(message.subsystem)
+                            message.args = [*router._INVALID_SUBSYSTEM,
+                                            message.subsystem]
                             message.subsystem = 'error'
                             self.connection.send_vip_object(message)
                         else:
@@ -1226,6 +1498,7 @@ class RMQCore(Core):
         # _log.debug("RMQ VIP Core {}".format(message))
         self._event_queue.put(message)
 
+    @_remote_backoff
     def connect_remote_platform(self,
                                 address,
                                 serverkey=None,
@@ -1255,136 +1528,103 @@ class RMQCore(Core):
         function.
 
         """
-        from volttron.platform.vip.agent import Agent
-        from volttron.platform.vip.agent.utils import build_agent
-
         if agent_class is None:
+            from volttron.platform.vip.agent import Agent
             agent_class = Agent
 
-        parsed_address = urllib.parse.urlparse(address)
-        _log.info("Begining core.connect_remote_platform: {}".format(address))
-        value = None
-        if parsed_address.scheme == "tcp":
-            # ZMQ connection
-            destination_serverkey = None
-            _log.debug(
-                f"parsed address scheme is tcp. auth enabled = {self.enable_auth}"
-            )
-            if self.enable_auth:
-                hosts = KnownHostsStore()
-                temp_serverkey = hosts.serverkey(address)
-                if not temp_serverkey:
-                    _log.info(
-                        "Destination serverkey not found in known hosts file, "
-                        "using config")
-                    destination_serverkey = serverkey
-                elif not serverkey:
-                    destination_serverkey = temp_serverkey
-                else:
-                    if temp_serverkey != serverkey:
-                        raise ValueError(
-                            "server_key passed and known hosts serverkey do not "
-                            ""
-                            "match!")
-                    destination_serverkey = serverkey
+        _log.info("Begining core.connect_remote_platform: %s", address)
+        scheme = urllib.parse.urlparse(address).scheme
+        connect = self._remote_schemes.get(scheme)
+        if connect is None:
+            raise ValueError(
+                "Invalid configuration found the address: {} has an invalid "
+                "scheme".format(address))
+        return getattr(self, connect)(address, serverkey, agent_class)
 
-            _log.debug("Connecting using: %s", get_fq_identity(self.identity))
+    def _connect_http(self, address, serverkey, agent_class):
+        from volttron.platform.vip.agent.utils import build_agent
+        from volttron.platform.auth.auth_protocols.auth_rmq import RMQConnectionAPI
+        from volttron.platform.web import (DiscoveryError,
+                                           cached_discovery_info)
 
-            value = build_agent(
-                agent_class=agent_class,
-                identity=get_fq_identity(self.identity),
-                serverkey=destination_serverkey,
-                publickey=self.publickey,
-                secretkey=self.secretkey,
-                message_bus="zmq",
-                address=address,
+        value = None
+        try:
+            # TODO: Use known host instead of looking up for discovery
+            # info if possible.
+
+            # We need to discover which type of bus is at the other end.
+            info = cached_discovery_info(address)
+            remote_identity = "{}.{}".format(
+                info.instance_name,
+                self._get_fq_identity(),
             )
-        elif parsed_address.scheme in ("https", "http"):
-            from volttron.platform.auth.auth_protocols.auth_rmq import RMQConnectionAPI
-            from volttron.platform.web import DiscoveryError, DiscoveryInfo
 
-            try:
-                # TODO: Use known host instead of looking up for discovery
-                # info if possible.
-
-                # We need to discover which type of bus is at the other end.
-                info = DiscoveryInfo.request_discovery_info(address)
-                remote_identity = "{}.{}.{}".format(
-                    info.instance_name,
-                    get_platform_instance_name(),
-                    self.identity,
-                )
-
-                _log.debug("Both remote and local are rmq messagebus.")
-                fqid_local = get_fq_identity(self.identity)
-
-                # Check if we already have the cert, if so use it
-                # instead of requesting cert again
-                remote_certs_dir = self.get_remote_certs_dir()
-                remote_cert_name = "{}.{}".format(info.instance_name,
-                                                  fqid_local)
-                certfile = os.path.join(remote_certs_dir,
-                                        remote_cert_name + ".crt")
-                if os.path.exists(certfile):
-                    response = certfile
-                else:
-                    response = self.request_cert(address, fqid_local, info)
-
-                if response is None:
-                    _log.error("there was no response from the server")
-                    value = None
-                elif isinstance(response, tuple):
-                    if response[0] == "PENDING":
-                        _log.info("Waiting for administrator to accept a "
-                                  "CSR request.")
-                    value = None
-                # elif isinstance(response, dict):
-                #     response
-                elif os.path.exists(response):
-                    # info = DiscoveryInfo.request_discovery_info(
-                    # address)
-                    # From the remote platforms perspective the
-                    # remote user name is
-                    #   remoteinstance.localinstance.identity,
-                    #   this is what we must
-                    #   pass to the build_remote_connection_params
-                    #   for a successful
-
-                    remote_rmq_user = get_fq_identity(fqid_local,
-                                                      info.instance_name)
-                    _log.debug("REMOTE RMQ USER IS: %s", remote_rmq_user)
-                    connection_api = RMQConnectionAPI(
-                        rmq_user=remote_rmq_user,
-                        url_address=info.rmq_address,
-                        ssl_auth=True)
-                    remote_rmq_address = connection_api.build_remote_connection_param(
-                        cert_dir=self.get_remote_certs_dir())
-
-                    value = build_agent(
-                        identity=fqid_local,
-                        address=remote_rmq_address,
-                        instance_name=info.instance_name,
-                        publickey=self.publickey,
-                        secretkey=self.secretkey,
-                        message_bus="rmq",
-                        enable_store=False,
-                        agent_class=agent_class,
-                    )
-                else:
-                    raise ValueError("Unknown path through discovery process!")
+            _log.debug("Both remote and local are rmq messagebus.")
+            fqid_local = self._get_fq_identity()
+
+            # Check if we already have the cert, if so use it
+            # instead of requesting cert again
+            remote_certs_dir = self.get_remote_certs_dir()
+            remote_cert_name = "{}.{}".format(info.instance_name,
+                                              fqid_local)
+            certfile = os.path.join(remote_certs_dir,
+                                    remote_cert_name + ".crt")
+            if os.path.exists(certfile):
+                response = certfile
+            else:
+                response = self.request_cert(address, fqid_local, info)
+
+            if response is None:
+                _log.error("there was no response from the server")
+                value = None
+            elif isinstance(response, tuple):
+                if response[0] == "PENDING":
+                    _log.info("Waiting for administrator to accept a "
+                              "CSR request.")
+                    raise _RemotePending()
+                value = None
+            # elif isinstance(response, dict):
+            #     response
+            elif os.path.exists(response):
+                # info = DiscoveryInfo.request_discovery_info(
+                # address)
+                # From the remote platforms perspective the
+                # remote user name is
+                #   remoteinstance.localinstance.identity,
+                #   this is what we must
+                #   pass to the build_remote_connection_params
+                #   for a successful
+
+                remote_rmq_user = get_fq_identity(fqid_local,
+                                                  info.instance_name)
+                _log.debug("REMOTE RMQ USER IS: %s", remote_rmq_user)
+                connection_api = RMQConnectionAPI(
+                    rmq_user=remote_rmq_user,
+                    url_address=info.rmq_address,
+                    ssl_auth=True)
+                remote_rmq_address = connection_api.build_remote_connection_param(
+                    cert_dir=self.get_remote_certs_dir())
 
-            except DiscoveryError:
-                _log.error(
-                    "Couldn't connect to %s or incorrect response returned "
-                    "response was %s",
-                    address,
-                    value,
+                value = build_agent(
+                    identity=fqid_local,
+                    address=remote_rmq_address,
+                    instance_name=info.instance_name,
+                    publickey=self.publickey,
+                    secretkey=self.secretkey,
+                    message_bus="rmq",
+                    enable_store=False,
+                    agent_class=agent_class,
                 )
+            else:
+                raise ValueError("Unknown path through discovery process!")
 
-        else:
-            raise ValueError(
-                "Invalid configuration found the address: {} has an invalid "
-                "scheme".format(address))
+        except DiscoveryError:
+            _log.error(
+                "Couldn't connect to %s or incorrect response returned "
+                "response was %s",
+                address,
+                value,
+            )
 
         return value
 
@@ -1431,16 +1671,12 @@ class RMQCore(Core):
             # get_platform_instance_name()+"."+self._core().identity,
             hostname=config.hostname,
         )
-        request = grequests.post(
+        response = _get_csr_session().post(
             csr_server + "/csr/request_new",
             json=jsonapi.dumps(json_request),
             verify=False,
         )
-        response = grequests.map([request])
-
-        if response and isinstance(response, list):
-            response[0].raise_for_status()
-        response = response[0]
+        response.raise_for_status()
         # response = requests.post(csr_server + "/csr/request_new",
         #                          json=jsonapi.dumps(json_request),
         #                          verify=False)
@@ -1452,6 +1688,7 @@ class RMQCore(Core):
         cert = j.get("cert")
         message = j.get("message", "")
         remote_certs_dir = self.get_remote_certs_dir()
+        certfile = os.path.join(remote_certs_dir, remote_cert_name + ".crt")
         if status == "SUCCESSFUL" or status == "APPROVED":
             self.rmq_mgmt.certs.save_agent_remote_info(
                 remote_certs_dir,
@@ -1467,8 +1704,10 @@ class RMQCore(Core):
                 "Set os.environ requests ca bundle to %s",
                 os.environ["REQUESTS_CA_BUNDLE"],
             )
+            # save_agent_remote_info just wrote the cert to certfile.
+            return certfile
         elif status == "PENDING":
-            _log.debug("Pending CSR request for {}".format(remote_cert_name))
+            _log.debug("Pending CSR request for %s", remote_cert_name)
         elif status == "DENIED":
             _log.error("Denied from remote machine.  Shutting down agent.")
             from volttron.platform.vip.agent.subsystems.health import Status
@@ -1491,7 +1730,6 @@ class RMQCore(Core):
         else:  # No resposne
             return None
 
-        certfile = os.path.join(remote_certs_dir, remote_cert_name + ".crt")
         if os.path.exists(certfile):
             return certfile
         else:
@@ -1499,15 +1737,13 @@ class RMQCore(Core):
 
     def get_remote_certs_dir(self):
         if not self.remote_certs_dir:
+            # scandir entries carry their file type, so is_dir() does not
+            # need a stat per entry.
             install_dir = os.path.join(get_home(), "agents", self.agent_uuid)
-            files = os.listdir(install_dir)
-            for f in files:
-                agent_dir = os.path.join(install_dir, f)
-                if os.path.isdir(agent_dir):
-                    break  # found
-            sub_dirs = os.listdir(agent_dir)
-            for d in sub_dirs:
-                d_path = os.path.join(agent_dir, d)
-                if os.path.isdir(d_path) and d.endswith("agent-data"):
-                    self.remote_certs_dir = d_path
+            with os.scandir(install_dir) as entries:
+                agent_dir = next(e.path for e in entries if e.is_dir())
+            with os.scandir(agent_dir) as entries:
+                for e in entries:
+                    if e.name.endswith("agent-data") and e.is_dir():
+                        self.remote_certs_dir = e.path
         return self.remote_certs_dir
@@ -25,6 +25,7 @@
 
 
 import logging
+import sys
 import weakref
 
 from .base import SubsystemBase
@@ -39,122 +40,175 @@ __all__ = ['PeerList']
 
 _log = logging.getLogger(__name__)
 
+_LIST_ARGS = ('list',)
+_LIST_WITH_MESSAGEBUS_ARGS = ('list_with_messagebus',)
+
+
+def _intern_peer(peer):
+    # Interned identities let set and dict probes match on identity first.
+    return sys.intern(peer) if isinstance(peer, str) else peer
+
 
 class PeerList(SubsystemBase):
     def __init__(self, core):
         self.core = weakref.ref(core)
+        self._core = weakref.proxy(core)
         self._results = ResultsDictionary()
         core.register('peerlist', self._handle_subsystem, self._handle_error)
         self.onadd = Signal()
         self.ondrop = Signal()
+        # Coalesced variants of onadd and ondrop: receivers get every peer
+        # added or dropped during one pass of the event loop in a single
+        # call, as peers=[(peer, message_bus), ...].
+        self.onaddpeers = Signal()
+        self.ondroppeers = Signal()
+        self._pending = []
+        self._flush_scheduled = False
         self.peers_list = set()
-
-    def list(self):
-        connection = self.core().connection
+        self._ops = {
+            'add': self._handle_peer,
+            'drop': self._handle_peer,
+            'add_bulk': self._handle_bulk,
+            'drop_bulk': self._handle_bulk,
+            'listing': self._handle_listing,
+            'listing_with_messagebus': self._handle_listing_with_messagebus,
+        }
+        # The core opens its connection before onsetup, and neither it nor
+        # the message bus changes afterwards, so bind send_vip once there.
+        self._send = None
+        self._messagebus = core.messagebus
+
+        def setup(sender, **kwargs):
+            # pylint: disable=unused-argument
+            self._send = sender.connection.send_vip
+
+        core.onsetup.connect(setup, self)
+
+    def _request(self, args):
+        send = self._send
+        if send is None:
+            send = self._core.connection.send_vip
         result = next(self._results)
-
         try:
-            connection.send_vip('',
-                                'peerlist',
-                                args=['list'],
-                                msg_id=result.ident)
+            send('', 'peerlist', args=args, msg_id=result.ident)
         except ZMQError as exc:
             if exc.errno == ENOTSOCK:
-                _log.error("Socket send on non socket {}".format(self.core().identity))
+                _log.error("Socket send on non socket %s", self._core.identity)
         return result
 
+    def list(self):
+        return self._request(_LIST_ARGS)
+
     def add_peer(self, peer, message_bus=None):
-        connection = self.core().connection
-        result = next(self._results)
-        if not message_bus:
-            message_bus = self.core().messagebus
-        try:
-            connection.send_vip('',
-                                'peerlist',
-                                args=['add', peer, message_bus],
-                                msg_id=result.ident)
-        except ZMQError as exc:
-            if exc.errno == ENOTSOCK:
-                _log.error("Socket send on non socket {}".format(self.core().identity))
-        return result
+        return self._request(('add', peer, message_bus or self._messagebus))
 
     def drop_peer(self, peer, message_bus=None):
-        connection = self.core().connection
-        result = next(self._results)
-        if not message_bus:
-            message_bus = self.core().messagebus
-        try:
-            connection.send_vip('',
-                                'peerlist',
-                                args=['drop', peer, message_bus],
-                                msg_id=result.ident)
-        except ZMQError as exc:
-            if exc.errno == ENOTSOCK:
-                _log.error("Socket send on non socket {}".format(self.core().identity))
-        return result
+        return self._request(('drop', peer, message_bus or self._messagebus))
 
-    def list_with_messagebus(self):
-        connection = self.core().connection
-        result = next(self._results)
+    def add_peers(self, peers, message_bus=None):
+        """Add several peers to the router with a single peerlist message."""
+        return self._request(('add_bulk', message_bus or self._messagebus, *peers))
 
-        try:
-            connection.send_vip('',
-                                'peerlist',
-                                args=['list_with_messagebus'],
-                                msg_id=result.ident)
-        except ZMQError as exc:
-            if exc.errno == ENOTSOCK:
-                _log.error("Socket send on non socket {}".format(self.core().identity))
-        return result
+    def drop_peers(self, peers, message_bus=None):
+        """Drop several peers from the router with a single peerlist message."""
+        return self._request(('drop_bulk', message_bus or self._messagebus, *peers))
+
+    def list_with_messagebus(self):
+        return self._request(_LIST_WITH_MESSAGEBUS_ARGS)
 
     __call__ = list
 
     def _handle_subsystem(self, message):
-        try:
-            op = message.args[0]
-        except IndexError:
+        if not message.args:
             _log.error('missing peerlist subsystem operation')
             return
+        op = message.args[0]
+        handler = self._ops.get(op)
+        if handler is None:
+            _log.error('unknown peerlist subsystem operation == {}'.format(op))
+            return
+        handler(op, message)
+
+    def _handle_peer(self, op, message):
+        args = message.args
+        count = len(args)
+        if count < 2:
+            _log.error('missing peerlist identity in %s operation', op)
+            return
+        peer = _intern_peer(args[1])
+        message_bus = args[2] if count > 2 else None
+        signal = self.onadd if op == 'add' else self.ondrop
+        if message_bus:
+            signal.send(self, peer=peer, message_bus=message_bus)
+        else:
+            signal.send(self, peer=peer)
+        if op == 'add':
+            self.peers_list.add(peer)
+            self._queue_batch(self.onaddpeers, (peer,), message_bus)
+        else:
+            self.peers_list.discard(peer)
+            self._queue_batch(self.ondroppeers, (peer,), message_bus)
 
-        if op in ['add', 'drop']:
-            try:
-                peer = message.args[1]
-            except IndexError:
-                _log.error('missing peerlist identity in %s operation', op)
-                return
-            message_bus = None
-            try:
-                message_bus = message.args[2]
-            except IndexError:
-                pass
-            # getattr requires a string
-            onop = 'on' + op
+    def _handle_bulk(self, op, message):
+        args = message.args
+        if len(args) < 2:
+            _log.error('missing peerlist message bus in %s operation', op)
+            return
+        message_bus = args[1]
+        peers = list(map(_intern_peer, args[2:]))
+        signal = self.onadd if op == 'add_bulk' else self.ondrop
+        for peer in peers:
             if message_bus:
-                getattr(self, onop).send(self, peer=peer, message_bus=message_bus)
+                signal.send(self, peer=peer, message_bus=message_bus)
             else:
-                getattr(self, onop).send(self, peer=peer)
-            if op == 'add':
-                self.peers_list.add(peer)
-            else:
-                if peer in self.peers_list:
-                    self.peers_list.remove(peer)
-        elif op == 'listing':
-            try:
-                result = self._results.pop(message.id)
-            except KeyError:
-                return
-
-            peers = [arg for arg in message.args[1:]]
-            result.set(peers)
-            self.peers_list = set(peers)
-        elif op == 'listing_with_messagebus':
-            try:
-                result = self._results.pop(message.id)
-            except KeyError:
-                return
-            result.set(jsonapi.loads(message.args[1]))
+                signal.send(self, peer=peer)
+        if op == 'add_bulk':
+            self.peers_list.update(peers)
+            self._queue_batch(self.onaddpeers, peers, message_bus)
         else:
-            _log.error('unknown peerlist subsystem operation == {}'.format(op))
+            self.peers_list.difference_update(peers)
+            self._queue_batch(self.ondroppeers, peers, message_bus)
+
+    def _queue_batch(self, signal, peers, message_bus):
+        if not signal:
+            return
+        pending = self._pending
+        # Keep adds and drops in arrival order by only merging into the
+        # last batch when it belongs to the same signal.
+        if pending and pending[-1][0] is signal:
+            batch = pending[-1][1]
+        else:
+            batch = []
+            pending.append((signal, batch))
+        batch.extend((peer, message_bus) for peer in peers)
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            self._core.spawn(self._flush_batches)
+
+    def _flush_batches(self):
+        pending, self._pending = self._pending, []
+        self._flush_scheduled = False
+        for signal, peers in pending:
+            signal.send(self, peers=peers)
+
+    def _handle_listing(self, op, message):
+        try:
+            result = self._results.pop(message.id)
+        except KeyError:
+            return
+
+        peers = list(map(_intern_peer, message.args[1:]))
+        result.set(peers)
+        peers_list = self.peers_list
+        peers_list.clear()
+        peers_list.update(peers)
+
+    def _handle_listing_with_messagebus(self, op, message):
+        try:
+            result = self._results.pop(message.id)
+        except KeyError:
+            return
+        result.set(jsonapi.loads(message.args[1]))
 
     def _handle_error(self, sender, message, error, **kwargs):
         try:
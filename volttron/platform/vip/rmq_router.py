@@ -233,6 +233,12 @@ class RMQRouter:
                 except IndexError:
                     message_bus = 'rmq'
                 self._drop_peer(peer=peer, message_bus=message_bus)
+            elif op in ('add_bulk', 'drop_bulk'):
+                # [op, message_bus, peer, ...]
+                message_bus = message.args[1] if len(message.args) > 1 else 'rmq'
+                update = self._add_peer if op == 'add_bulk' else self._drop_peer
+                for peer in message.args[2:]:
+                    update(peer=peer, message_bus=message_bus)
             else:
                 error = ('unknown' if op else 'missing') + ' operation'
                 message.args.extend(['error', error])
@@ -24,7 +24,9 @@
 
 import zmq
 import logging
+from zmq import green
 
+from . import Socket
 from .green import Socket as GreenSocket
 from .rmq_connection import BaseConnection
 _log = logging.getLogger(__name__)
@@ -40,20 +42,43 @@ class ZMQConnection(BaseConnection):
         self.socket = None
         self.context = context
         self._identity = identity
+        self._identity_bytes = identity.encode('utf-8') if identity else None
         self._logger = logging.getLogger(__name__)
         self._logger.debug("ZMQ connection {}".format(identity))
 
+    def _socket_class(self):
+        """
+        Return the VIP socket class matching the context, so callers that
+        pass a plain zmq context do not go through the gevent hub.
+        """
+        if isinstance(self.context, green.Context):
+            return GreenSocket
+        return Socket
+
     def open_connection(self, type):
         if type == zmq.DEALER:
-            self.socket = GreenSocket(self.context)
-            if self._identity:
-                self.socket.identity = self._identity.encode('utf-8')
+            self.socket = self._socket_class()(self.context)
+            if self._identity_bytes:
+                self.socket.identity = self._identity_bytes
         else:
             self.socket = zmq.Socket()
 
+    # Optional socket options set by set_properties only when present in
+    # flags, leaving the libzmq defaults in place otherwise.
+    _socket_options = (('sndbuf', zmq.SNDBUF),
+                       ('rcvbuf', zmq.RCVBUF),
+                       ('immediate', zmq.IMMEDIATE),
+                       ('tcp_keepalive', zmq.TCP_KEEPALIVE),
+                       ('linger', zmq.LINGER))
+
     def set_properties(self,flags):
         hwm = flags.get('hwm', 6000)
-        self.socket.set_hwm(hwm)
+        self.socket.setsockopt(zmq.SNDHWM, flags.get('sndhwm', hwm))
+        self.socket.setsockopt(zmq.RCVHWM, flags.get('rcvhwm', hwm))
+        for name, option in self._socket_options:
+            value = flags.get(name)
+            if value is not None:
+                self.socket.setsockopt(option, value)
         reconnect_interval = flags.get('reconnect_interval', None)
         if reconnect_interval:
             self.socket.setsockopt(zmq.RECONNECT_IVL, reconnect_interval)
@@ -33,7 +33,8 @@ try:
 except ImportError:
     pass
 
-from . discovery import DiscoveryInfo, DiscoveryError
+from . discovery import (DiscoveryInfo, DiscoveryError, cached_discovery_info,
+                         clear_discovery_cache)
 
 # Used outside so we make it available through this file.
 from . platform_web_service import PlatformWebService
@@ -1,4 +1,8 @@
 import logging
+import time
+from collections import OrderedDict
+
+import gevent.lock
 import grequests
 from requests.exceptions import RequestException
 
@@ -9,6 +13,22 @@ from volttron.platform.auth.certs import Certs
 
 _log = logging.getLogger(__name__)
 
+# Seconds a discovery response is reused and how many addresses are kept.
+DISCOVERY_CACHE_TTL = 300.0
+DISCOVERY_CACHE_SIZE = 128
+# Seconds a failed lookup is reported again without contacting the address.
+DISCOVERY_FAILURE_TTL = 30.0
+
+# address -> (time.monotonic() when fetched, DiscoveryInfo), oldest first.
+_discovery_cache = OrderedDict()
+# address -> (time.monotonic() when the failure expires, error message)
+_discovery_failures = {}
+# Guards the two dicts above and _discovery_address_locks. It is never held
+# across a request to the /discovery/ endpoint.
+_discovery_lock = gevent.lock.RLock()
+# address -> lock held by the caller currently requesting that address
+_discovery_address_locks = {}
+
 
 class DiscoveryError(Exception):
     """ Raised when a different volttron central tries to register.
@@ -100,3 +120,81 @@ class DiscoveryInfo:
             dk['serverkey'] = self.serverkey
 
         return jsonapi.dumps(dk)
+
+
+def _cached_lookup(web_address, ttl):
+    """ Return the cached `DiscoveryInfo` for web_address, or None.
+
+    Raises a new DiscoveryError while a failed lookup is still cached.
+    """
+    with _discovery_lock:
+        cached = _discovery_cache.get(web_address)
+        if cached is not None and time.monotonic() - cached[0] < ttl:
+            _discovery_cache.move_to_end(web_address)
+            return cached[1]
+        failed = _discovery_failures.get(web_address)
+        if failed is not None:
+            if time.monotonic() < failed[0]:
+                raise DiscoveryError(failed[1])
+            del _discovery_failures[web_address]
+    return None
+
+
+def cached_discovery_info(web_address, ttl=None):
+    """ Return a `DiscoveryInfo` for web_address, reusing a recent response.
+
+    Concurrent lookups of the same address share one request to the
+    /discovery/ endpoint; lookups of other addresses are not held up by it.
+    A DiscoveryError is raised as from
+    `DiscoveryInfo.request_discovery_info` and raised again for
+    DISCOVERY_FAILURE_TTL seconds without retrying the address.
+
+    :param web_address: An http(s) address with volttron running.
+    :param ttl: Seconds a cached response stays valid, defaults to
+        DISCOVERY_CACHE_TTL.
+    :return:
+    """
+    if ttl is None:
+        ttl = DISCOVERY_CACHE_TTL
+    info = _cached_lookup(web_address, ttl)
+    if info is not None:
+        return info
+    with _discovery_lock:
+        lock = _discovery_address_locks.get(web_address)
+        if lock is None:
+            lock = _discovery_address_locks[web_address] = gevent.lock.RLock()
+    with lock:
+        try:
+            # Another caller may have finished the request while this one
+            # waited for the lock.
+            info = _cached_lookup(web_address, ttl)
+            if info is not None:
+                return info
+            try:
+                info = DiscoveryInfo.request_discovery_info(web_address)
+            except DiscoveryError as e:
+                with _discovery_lock:
+                    if len(_discovery_failures) >= DISCOVERY_CACHE_SIZE:
+                        _discovery_failures.clear()
+                    _discovery_failures[web_address] = (
+                        time.monotonic() + DISCOVERY_FAILURE_TTL, str(e))
+                raise
+            with _discovery_lock:
+                _discovery_cache[web_address] = (time.monotonic(), info)
+                _discovery_cache.move_to_end(web_address)
+                while len(_discovery_cache) > DISCOVERY_CACHE_SIZE:
+                    _discovery_cache.popitem(last=False)
+            return info
+        finally:
+            # Waiters already hold this lock object and re-check the cache,
+            # so the entry can go once the request is done.
+            with _discovery_lock:
+                if _discovery_address_locks.get(web_address) is lock:
+                    del _discovery_address_locks[web_address]
+
+
+def clear_discovery_cache():
+    """ Forget all cached discovery responses and failures. """
+    with _discovery_lock:
+        _discovery_cache.clear()
+        _discovery_failures.clear()
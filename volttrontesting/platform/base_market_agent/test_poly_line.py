@@ -138,6 +138,22 @@ def test_poly_line_no_intersection():
     assert len(intersection) == 2
 
 
+@pytest.mark.market
+def test_poly_line_x_array():
+    demand = create_demand_curve()
+    xs = demand.x([1000, 500, 0])
+    assert list(xs) == [0, 500, 1000]
+    assert xs[1] == demand.x(500)
+
+
+@pytest.mark.market
+def test_poly_line_y_array():
+    demand = create_demand_curve()
+    ys = demand.y([0, 250, 1000])
+    assert list(ys) == [1000, 750, 0]
+    assert ys[1] == demand.y(250)
+
+
 def create_supply_curve():
     supply_curve = PolyLine()
     price = 0
@@ -25,7 +25,14 @@
 
 import os
 
-from volttron.platform.web import DiscoveryInfo
+import gevent
+import gevent.event
+
+import pytest
+
+from volttron.platform.web import (DiscoveryError, DiscoveryInfo,
+                                   cached_discovery_info,
+                                   clear_discovery_cache)
 from volttrontesting.platform.web.test_web_authentication import skip_non_auth
 
 
@@ -55,3 +62,76 @@ def test_discovery_endpoint(volttron_instance_web):
         assert ca_cert == info.rmq_ca_cert.encode('utf-8')
         print(ca_cert)
         print(info.rmq_ca_cert.encode('utf-8'))
+
+
+def test_cached_discovery_info(monkeypatch):
+    """
+    Test that discovery responses are reused per address until the ttl passes
+    """
+    calls = []
+
+    def fake_request(web_address):
+        calls.append(web_address)
+        return object()
+
+    monkeypatch.setattr(DiscoveryInfo, 'request_discovery_info', fake_request)
+    clear_discovery_cache()
+    try:
+        first = cached_discovery_info('http://one')
+        assert cached_discovery_info('http://one') is first
+        assert cached_discovery_info('http://two') is not first
+        assert calls == ['http://one', 'http://two']
+        assert cached_discovery_info('http://one', ttl=0) is not first
+        assert calls == ['http://one', 'http://two', 'http://one']
+    finally:
+        clear_discovery_cache()
+
+
+def test_cached_discovery_failure(monkeypatch):
+    """
+    Test that a failed lookup is not retried while it is cached
+    """
+    calls = []
+
+    def fake_request(web_address):
+        calls.append(web_address)
+        raise DiscoveryError("Connection to {} not available".format(web_address))
+
+    monkeypatch.setattr(DiscoveryInfo, 'request_discovery_info', fake_request)
+    clear_discovery_cache()
+    try:
+        for _ in range(3):
+            with pytest.raises(DiscoveryError):
+                cached_discovery_info('http://down')
+        assert calls == ['http://down']
+    finally:
+        clear_discovery_cache()
+
+
+def test_cached_discovery_per_address(monkeypatch):
+    """
+    Test that a slow lookup is shared by its callers and does not block
+    lookups of other addresses
+    """
+    calls = []
+    release = gevent.event.Event()
+
+    def fake_request(web_address):
+        calls.append(web_address)
+        if web_address == 'http://slow':
+            release.wait(5)
+        return object()
+
+    monkeypatch.setattr(DiscoveryInfo, 'request_discovery_info', fake_request)
+    clear_discovery_cache()
+    try:
+        slow = [gevent.spawn(cached_discovery_info, 'http://slow') for _ in range(2)]
+        gevent.sleep(0)
+        cached_discovery_info('http://fast')
+        assert not any(glt.ready() for glt in slow)
+        release.set()
+        gevent.joinall(slow, timeout=5)
+        assert slow[0].value is slow[1].value
+        assert calls == ['http://slow', 'http://fast']
+    finally:
+        clear_discovery_cache()